@@ -0,0 +1,283 @@
+#!/usr/bin/python3
+
+# Frame input/output helpers shared by mazelib, make_gif.py and make_video.py
+
+import os
+import mmap
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+
+# Frame Archive
+# ----------------------------------------------------------------
+#   A single append-only file holding the frames of a generation.
+#   Each frame is an encoded image (PNG, fast compression),
+#   stored as a record with its sequence number.
+#   The index of the record offsets is written on close,
+#   so any frame can be read without scanning the file.
+#   If the index is missing (interrupted run) it is rebuilt by scanning.
+
+# Layout
+#   header  : MAGIC, version (u32)
+#   record  : seq (u32), length (u64), data
+#   index   : INDEX_MAGIC, count (u64), offsets (u64 * count)
+#   footer  : index offset (u64), END_MAGIC
+
+ARCHIVE_MAGIC   = b'MZFRAMES'
+ARCHIVE_VERSION = 1
+INDEX_MAGIC     = b'MZINDEX!'
+END_MAGIC       = b'MZFEND!!'
+ARCHIVE_EXT     = '.frames'
+
+_HEADER = struct.Struct('<8sI')
+_RECORD = struct.Struct('<IQ')
+_COUNT  = struct.Struct('<8sQ')
+_FOOTER = struct.Struct('<Q8s')
+
+
+
+
+
+def list_frames(directory, ext='.png'):
+    """
+    Lists the frame images of a directory, sorted by name.
+
+    Parameters:
+    directory (str): The directory containing the images.
+    ext (str): The extension of the images.
+
+    Returns:
+    list: The sorted paths of the images.
+    """
+    with os.scandir(directory) as entries:
+        paths = [entry.path for entry in entries if entry.is_file() and entry.name.endswith(ext)]
+    return sorted(paths)
+
+
+
+def read_image(source):
+    """
+    Decodes an image from a path or from encoded bytes.
+
+    Parameters:
+    source (str or bytes): The path of the image, or its encoded content.
+
+    Returns:
+    ndarray: The decoded image.
+    """
+    import imageio.v2 as imageio
+    return imageio.imread(source)
+
+
+
+def iter_frames(paths, workers=None, lookahead=None, load=read_image):
+    """
+    Decodes images with a thread pool and yields them in order.
+    At most `lookahead` decoded (or in progress) frames are kept in memory.
+
+    Parameters:
+    paths (list): The paths of the images, in order (or any item accepted by load).
+    workers (int): Number of decoding threads. Default is the number of CPUs.
+    lookahead (int): Number of frames decoded ahead. Default is 2*workers.
+    load (function): The function decoding one item. Default is read_image.
+
+    Yields:
+    ndarray: The decoded images, in the order of paths.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if lookahead is None:
+        lookahead = 2 * workers
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        paths   = iter(paths)
+
+        # Fill the look-ahead window
+        for path in paths:
+            pending.append(pool.submit(load, path))
+            if len(pending) >= lookahead:
+                break
+
+        # Yield the oldest frame, then submit the next one
+        while pending:
+            frame = pending.popleft().result()
+            for path in paths:
+                pending.append(pool.submit(load, path))
+                break
+            yield frame
+
+
+
+def frame_source(path):
+    """
+    Opens the frames of a generation, stored either as a directory
+    of PNG images or as a frame archive.
+
+    Parameters:
+    path (str): The directory or the archive file.
+
+    Returns:
+    tuple: (items, load), to be passed to iter_frames.
+    """
+    if os.path.isdir(path):
+        return list_frames(path), read_image
+    archive = FrameArchiveReader(path)
+    return range(len(archive)), archive.frame
+
+
+
+
+class FrameArchiveWriter:
+    """
+    Appends encoded frames to a frame archive.
+    Use as a context manager, or call close() to write the index.
+    """
+
+    def __init__(self, path):
+        """
+        Creates the archive file (overwrite it if it exists).
+
+        Parameters:
+        path (str): The path of the archive.
+        """
+        self.path    = path
+        self.fp      = open(path, 'wb')
+        self.offsets = []
+        self.fp.write(_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION))
+
+    def append(self, data):
+        """
+        Appends an encoded frame.
+
+        Parameters:
+        data (bytes): The encoded image.
+
+        Returns:
+        int: The sequence number of the frame.
+        """
+        seq = len(self.offsets)
+        self.offsets.append(self.fp.tell())
+        self.fp.write(_RECORD.pack(seq, len(data)))
+        self.fp.write(data)
+        return seq
+
+    def close(self):
+        """
+        Writes the index and the footer, then closes the file.
+        """
+        if self.fp.closed:
+            return
+        index_offset = self.fp.tell()
+        self.fp.write(_COUNT.pack(INDEX_MAGIC, len(self.offsets)))
+        self.fp.write(struct.pack(f'<{len(self.offsets)}Q', *self.offsets))
+        self.fp.write(_FOOTER.pack(index_offset, END_MAGIC))
+        self.fp.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+
+
+class FrameArchiveReader:
+    """
+    Random access to the frames of a frame archive.
+    The file is memory-mapped, reads are safe from several threads.
+    """
+
+    def __init__(self, path):
+        """
+        Opens the archive and loads (or rebuilds) its index.
+
+        Parameters:
+        path (str): The path of the archive.
+        """
+        self.path = path
+        with open(path, 'rb') as fp:
+            self.mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = _HEADER.unpack_from(self.mm, 0)
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            raise ValueError(f"{path} is not a frame archive")
+
+        self.offsets = self._read_index()
+        if self.offsets is None:
+            self.offsets = self._scan_records()
+
+    def _read_index(self):
+        # The footer closes a complete archive
+        size = len(self.mm)
+        if size < _HEADER.size + _FOOTER.size:
+            return None
+        index_offset, end = _FOOTER.unpack_from(self.mm, size - _FOOTER.size)
+        if end != END_MAGIC:
+            return None
+        magic, count = _COUNT.unpack_from(self.mm, index_offset)
+        if magic != INDEX_MAGIC:
+            return None
+        return list(struct.unpack_from(f'<{count}Q', self.mm, index_offset + _COUNT.size))
+
+    def _scan_records(self):
+        # Walk the records, stop at the first truncated one
+        offsets = []
+        offset  = _HEADER.size
+        size    = len(self.mm)
+        while offset + _RECORD.size <= size:
+            seq, length = _RECORD.unpack_from(self.mm, offset)
+            if seq != len(offsets) or offset + _RECORD.size + length > size:
+                break
+            offsets.append(offset)
+            offset += _RECORD.size + length
+        return offsets
+
+    def read(self, i):
+        """
+        Returns the encoded frame i.
+
+        Parameters:
+        i (int): The sequence number of the frame.
+
+        Returns:
+        bytes: The encoded image.
+        """
+        offset = self.offsets[i]
+        _, length = _RECORD.unpack_from(self.mm, offset)
+        start = offset + _RECORD.size
+        return self.mm[start:start + length]
+
+    def frame(self, i):
+        """
+        Returns the decoded frame i.
+
+        Parameters:
+        i (int): The sequence number of the frame.
+
+        Returns:
+        ndarray: The decoded image.
+        """
+        return read_image(self.read(i))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.read(i)
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
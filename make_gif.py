@@ -1,37 +1,299 @@
 #!/usr/bin/python3
 
-import os
-import sys
-import imageio.v2 as imageio
+import argparse
+import struct
+import numpy as np
+from PIL import Image
+from PIL import GifImagePlugin
+from frameio import frame_source, iter_frames, ARCHIVE_EXT
 
 
 
+# Palette index reserved for the transparent (unchanged) pixels
+TRANSPARENT_INDEX = 255
 
-def create_gif_from_images(directory, output_file, fps=12):
+# Most colors of the global palette (one more index is the transparent one)
+MAX_GLOBAL_COLORS = 255
 
-    # Get a list of all PNG files in the directory
-    image_files = sorted([file for file in os.listdir(directory) if file.endswith('.png')])
+# Offset of the global color table (after the signature and the screen descriptor)
+GLOBAL_TABLE_OFFSET = 13
 
-    # Iterate through each image file, add it to the images list
-    images = []
-    for image_file in image_files:
-        image_path = os.path.join(directory, image_file)
-        images.append(imageio.imread(image_path))
+# GIF disposal method: leave the frame in place (do not dispose)
+DISPOSAL_KEEP = 1
 
-    # Write GIF file
-    duration = 1/fps
-    imageio.mimsave(output_file, images, duration=duration, loop=0)
 
 
 
-# get argument
-directory = sys.argv[1]
+def pack_rgb(pixels):
+    """
+    Packs RGB pixels into integers (0xRRGGBB).
 
-# Check if the directory ends with "/"
-if directory.endswith("/"):
-    # Remove the trailing "/"
-    directory = directory[:-1]
+    Parameters:
+    pixels (ndarray): An (..., 3) uint8 array.
 
-output_file = f'{directory}.gif'
-fps = 8
-create_gif_from_images(directory, output_file, fps)
\ No newline at end of file
+    Returns:
+    ndarray: The (...) uint32 array of packed colors.
+    """
+    pixels = pixels.astype(np.uint32)
+    return (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+
+
+
+def add_colors(palette, pixels):
+    """
+    Adds the new colors of some pixels to the global palette.
+    The colors keep their index: the new ones are appended,
+    in the order of their packed values.
+
+    Parameters:
+    palette (ndarray): The packed colors of the palette, in index order (see pack_rgb).
+    pixels (ndarray): An (..., 3) uint8 array, e.g. the changed pixels of a frame.
+
+    Returns:
+    ndarray: The packed colors of the extended palette.
+    """
+    colors = np.unique(pack_rgb(pixels))
+    return np.concatenate((palette, colors[~np.isin(colors, palette)]))
+
+
+
+def palette_table(palette):
+    """
+    Builds the global color table: the colors of the palette,
+    padded to 256 entries (so the table keeps its size as the palette grows).
+
+    Parameters:
+    palette (ndarray): The packed colors of the palette, in index order.
+
+    Returns:
+    bytes: The 256 RGB entries of the table.
+    """
+    table = np.zeros((256, 3), dtype=np.uint8)
+    table[:len(palette), 0] = palette >> 16
+    table[:len(palette), 1] = palette >> 8
+    table[:len(palette), 2] = palette
+    return table.tobytes()
+
+
+
+def changed_bbox(prev_frame, frame):
+    """
+    Computes the bounding box of the pixels that differ between two frames.
+
+    Parameters:
+    prev_frame (ndarray): The previous frame (H x W x C).
+    frame (ndarray): The current frame (H x W x C).
+
+    Returns:
+    tuple or None: (x0, y0, x1, y1) of the changed area (x1, y1 excluded),
+                   None if the frames are identical.
+    """
+    # Pixel-wise change mask (any channel)
+    changed = np.any(prev_frame != frame, axis=-1)
+
+    # Rows and columns containing at least one changed pixel
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(changed.any(axis=0))
+
+    return cols[0], rows[0], cols[-1] + 1, rows[-1] + 1
+
+
+
+def encode_frame(frame, bbox, keep_mask, duration, palette=None):
+    """
+    Encodes the sub-rectangle of a frame as GIF image data.
+    Pixels outside keep_mask are written as transparent,
+    so the previous frame shows through.
+
+    With a global palette, the pixels are its indexes (no local color table).
+    Otherwise the sub-rectangle is quantized with its own local palette.
+
+    Parameters:
+    frame (ndarray): The full RGB frame (H x W x 3).
+    bbox (tuple): (x0, y0, x1, y1) of the sub-rectangle to encode.
+    keep_mask (ndarray or None): Boolean mask (same size of bbox) of the pixels to draw.
+                                 None means draw every pixel.
+    duration (int): Duration of the frame in milliseconds.
+    palette (ndarray, optional): The packed colors of the global palette, in index order
+                                 (see add_colors). It must hold the colors of the frame.
+
+    Returns:
+    bytes: GIF data of the frame (graphic control extension + image).
+    """
+    x0, y0, x1, y1 = bbox
+    crop = frame[y0:y1, x0:x1]
+
+    transparent = TRANSPARENT_INDEX
+    if palette is not None:
+        # Indexes in the global palette
+        order   = np.argsort(palette)
+        indexes = order[np.searchsorted(palette[order], pack_rgb(crop))].astype(np.uint8)
+    else:
+        # Quantize the sub-rectangle with its own local palette,
+        # leaving one slot free for the transparent index
+        quant   = Image.fromarray(np.ascontiguousarray(crop)).quantize(colors=TRANSPARENT_INDEX)
+
+        # Pad the palette to 256 entries (the transparent index must exist)
+        local_palette = quant.getpalette()[:3*TRANSPARENT_INDEX]
+        local_palette = local_palette + [0] * (3*256 - len(local_palette))
+        indexes = np.asarray(quant).copy()
+
+    # Mark unchanged pixels as transparent
+    if keep_mask is not None:
+        indexes[~keep_mask] = transparent
+    sub_im = Image.fromarray(indexes, mode='P')
+    if palette is None:
+        sub_im.putpalette(local_palette)
+
+    # Encode with offset, (local palette), transparency and disposal
+    data = GifImagePlugin.getdata(sub_im, offset=(int(x0), int(y0)),
+                                  duration=duration,
+                                  disposal=DISPOSAL_KEEP,
+                                  transparency=transparent,
+                                  include_color_table=palette is None)
+    return b''.join(data)
+
+
+
+def write_gif_header(fp, width, height, loop=0, palette=None):
+    """
+    Writes the GIF header and the looping extension.
+
+    Parameters:
+    fp (file): The output binary file.
+    width (int): Width of the GIF canvas.
+    height (int): Height of the GIF canvas.
+    loop (int): Number of loops, 0 means forever.
+    palette (ndarray, optional): The packed colors of the global palette, in index order
+                                 (see palette_table). Default is no global palette.
+    """
+    if palette is None:
+        # Signature and logical screen descriptor (no global color table)
+        fp.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0))
+    else:
+        # Global color table of 256 entries (8 bits per channel)
+        flags = 0x80 | 0x70 | 0x07
+        fp.write(b'GIF89a' + struct.pack('<HHBBB', width, height, flags, 0, 0))
+        fp.write(palette_table(palette))
+    # Netscape application extension (looping)
+    fp.write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', loop) + b'\x00')
+
+
+
+def create_gif_from_images(source, output_file, fps=12, workers=None):
+    """
+    Creates a GIF from the frames of a generation
+    (a directory of PNG images or a frame archive).
+    Only the changed sub-rectangle of each frame is encoded,
+    the unchanged area is kept from the previous frame.
+    The colors of the changed pixels are added to one global palette as the
+    frames go, its table is written back over the header at the end;
+    once it is full, the next frames have their own local palette.
+    Images are decoded in parallel, a few frames ahead of the writer.
+
+    Parameters:
+    source (str): The directory of PNG images or the frame archive.
+    output_file (str): The path of the output GIF.
+    fps (int): Frames per second.
+    workers (int): Number of decoding threads. Default is the number of CPUs.
+    """
+
+    # Get the frames and their loader
+    frames, load = frame_source(source)
+    if not frames:
+        return
+
+    # Global palette, grown with the colors of each frame (None once full),
+    # and the colors of its table (the last palette before it was full)
+    palette = np.empty(0, dtype=np.uint32)
+    table   = palette
+
+    # Frame duration in milliseconds
+    duration = 1000/fps
+
+    with open(output_file, 'wb') as fp:
+
+        prev_frame  = None
+        pending     = None      # (frame, bbox, keep_mask, palette) not yet written
+        pending_dur = 0         # accumulated duration of the pending frame
+
+        # Iterate through each image file, encode only the changes
+        for frame in iter_frames(frames, workers, load=load):
+            frame = frame[..., :3]
+
+            # First frame: full canvas
+            if prev_frame is None:
+                height, width = frame.shape[:2]
+                bbox      = (0, 0, width, height)
+                keep_mask = None
+            # Frames with a different size are drawn in full (clipped to the canvas)
+            elif frame.shape != prev_frame.shape:
+                frame = frame[:height, :width]
+                bbox  = (0, 0, frame.shape[1], frame.shape[0])
+                keep_mask = None
+            else:
+                bbox = changed_bbox(prev_frame, frame)
+                # Identical frame: extend the duration of the pending one
+                if bbox is None:
+                    pending_dur += duration
+                    continue
+                x0, y0, x1, y1 = bbox
+                keep_mask = np.any(prev_frame[y0:y1, x0:x1] != frame[y0:y1, x0:x1], axis=-1)
+
+            # Add the colors of the drawn pixels, until the palette is full
+            if palette is not None:
+                x0, y0, x1, y1 = bbox
+                crop    = frame[y0:y1, x0:x1]
+                palette = add_colors(palette, crop if keep_mask is None else crop[keep_mask])
+                if len(palette) > MAX_GLOBAL_COLORS:
+                    palette = None
+                else:
+                    table = palette
+
+            if prev_frame is None:
+                # Header with the table to fill in at the end
+                write_gif_header(fp, width, height, palette=table)
+            else:
+                # Write the pending frame, now that its duration is known
+                fp.write(encode_frame(*pending[:3], round(pending_dur), pending[3]))
+            pending     = (frame, bbox, keep_mask, palette)
+            pending_dur = duration
+
+            # Previous frame is the whole visible canvas
+            if prev_frame is None or frame.shape == prev_frame.shape:
+                prev_frame = frame
+            else:
+                prev_frame = prev_frame.copy()
+                prev_frame[:frame.shape[0], :frame.shape[1]] = frame
+
+        # Write the last frame and the trailer
+        fp.write(encode_frame(*pending[:3], round(pending_dur), pending[3]))
+        fp.write(b';')
+
+        # Write the colors of the global table
+        fp.seek(GLOBAL_TABLE_OFFSET)
+        fp.write(palette_table(table))
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create a GIF from the images of a maze generation.")
+    parser.add_argument("source", help="frame archive, or directory containing the PNG images")
+    parser.add_argument("-o", "--output", help="output GIF file (default: <source>.gif)")
+    parser.add_argument("--fps", type=float, default=8, help="frames per second (default: 8)")
+    parser.add_argument("--workers", type=int, default=None, help="decoding threads (default: number of CPUs)")
+    args = parser.parse_args()
+
+    # Remove the trailing "/" (if any) and the archive extension
+    source = args.source.rstrip("/")
+    name   = source[:-len(ARCHIVE_EXT)] if source.endswith(ARCHIVE_EXT) else source
+
+    output_file = args.output or f'{name}.gif'
+    create_gif_from_images(source, output_file, args.fps, args.workers)
+
+
+
+if __name__ == "__main__":
+    main()
@@ -5,22 +5,35 @@
 # pip install imageio[pyav]
 
 import os
-import sys
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import imageio.v2 as imageio
+from frameio import frame_source, iter_frames, ARCHIVE_EXT
 
 
-def create_video_from_images(directory, output_file, fps=12):
+# Fewest frames in a segment, shorter runs are not worth an encoder
+MIN_SEGMENT_FRAMES = 64
 
-    # Get a list of all PNG files in the directory
-    image_files = sorted([file for file in os.listdir(directory) if file.endswith('.png')])
 
+
+def encode_segment(frames, load, output_file, fps, workers=None):
+    """
+    Encodes a sequence of frames into a video file.
+
+    Parameters:
+    frames (list): The frames to encode (items accepted by load).
+    load (function): The function decoding one frame.
+    output_file (str): The path of the output video.
+    fps (int): Frames per second.
+    workers (int): Number of decoding threads. Default is the number of CPUs.
+    """
     # Create a writer object to write the video
     writer = imageio.get_writer(output_file, fps=fps)
 
-    # Iterate through each image file, add it to the video
-    for image_file in image_files:
-        image_path = os.path.join(directory, image_file)
-        image = imageio.imread(image_path)
+    # Iterate through each image, add it to the video
+    for image in iter_frames(frames, workers, load=load):
         writer.append_data(image)
 
     # Close the writer
@@ -28,14 +41,100 @@ def create_video_from_images(directory, output_file, fps=12):
 
 
 
-# get argument
-directory = sys.argv[1]
+def concat_segments(segment_files, output_file):
+    """
+    Joins video segments (same codec and parameters) into one file,
+    without re-encoding (ffmpeg concat demuxer, stream copy).
+
+    Parameters:
+    segment_files (list): The paths of the segments, in order.
+    output_file (str): The path of the output video.
+    """
+    import imageio_ffmpeg
+
+    # The concat demuxer reads the segments from a list file
+    list_file = os.path.splitext(segment_files[0])[0] + '.txt'
+    with open(list_file, 'w') as fp:
+        for path in segment_files:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            fp.write(f"file '{escaped}'\n")
+
+    subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+                    '-f', 'concat', '-safe', '0', '-i', list_file,
+                    '-c', 'copy', output_file], check=True)
+
+
+
+def create_video_from_images(source, output_file, fps=12, workers=None, segments=None):
+    """
+    Creates a video from the frames of a generation
+    (a directory of PNG images or a frame archive).
+    Images are decoded in parallel, a few frames ahead of the writer.
+
+    Long runs are split into segments encoded at the same time
+    (one ffmpeg process each), then joined without re-encoding.
+
+    Parameters:
+    source (str): The directory of PNG images or the frame archive.
+    output_file (str): The path of the output video.
+    fps (int): Frames per second.
+    workers (int): Number of decoding threads. Default is the number of CPUs.
+    segments (int): Number of segments encoded in parallel.
+                    Default is the number of CPUs (at most one per MIN_SEGMENT_FRAMES frames).
+    """
+
+    # Get the frames and their loader
+    frames, load = frame_source(source)
+
+    # Number of segments
+    if segments is None:
+        segments = os.cpu_count() or 1
+    segments = max(1, min(segments, len(frames) // MIN_SEGMENT_FRAMES))
+
+    # Short run: a single encoder
+    if segments == 1:
+        encode_segment(frames, load, output_file, fps, workers)
+        return
+
+    # Split the frames in contiguous chunks, share the decoding threads
+    bounds = [len(frames) * i // segments for i in range(segments + 1)]
+    chunks = [frames[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    decode_workers = max(1, (workers or os.cpu_count() or 1) // segments)
+
+    # Segments next to the output (same file system), removed at the end
+    ext = os.path.splitext(output_file)[1] or '.mp4'
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file))) as tmpdir:
+        segment_files = [os.path.join(tmpdir, f'segment_{i:04d}{ext}') for i in range(segments)]
+
+        # Encode the segments at the same time
+        with ThreadPoolExecutor(max_workers=segments) as pool:
+            jobs = [pool.submit(encode_segment, chunk, load, path, fps, decode_workers)
+                    for chunk, path in zip(chunks, segment_files)]
+            for job in jobs:
+                job.result()
+
+        # Join them in order
+        concat_segments(segment_files, output_file)
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create a video from the images of a maze generation.")
+    parser.add_argument("source", help="frame archive, or directory containing the PNG images")
+    parser.add_argument("-o", "--output", help="output video file (default: <source>.mp4)")
+    parser.add_argument("--fps", type=float, default=8, help="frames per second (default: 8)")
+    parser.add_argument("--workers", type=int, default=None, help="decoding threads (default: number of CPUs)")
+    parser.add_argument("--segments", type=int, default=None, help="segments encoded in parallel (default: number of CPUs)")
+    args = parser.parse_args()
+
+    # Remove the trailing "/" (if any) and the archive extension
+    source = args.source.rstrip("/")
+    name   = source[:-len(ARCHIVE_EXT)] if source.endswith(ARCHIVE_EXT) else source
+
+    output_file = args.output or f'{name}.mp4'
+    create_video_from_images(source, output_file, args.fps, args.workers, args.segments)
+
 
-# Check if the directory ends with "/"
-if directory.endswith("/"):
-    # Remove the trailing "/"
-    directory = directory[:-1]
 
-output_file = f'{directory}.mp4'
-fps = 8
-create_video_from_images(directory, output_file, fps)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
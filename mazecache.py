@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+
+# Maze Cache
+# ----------------------------------------------------------------
+#   On-disk cache of generated mazes, keyed by
+#   (algorithm, height, width, seed).
+#   Each maze is a .npy file of wall bits (see mazelib.maze_to_array),
+#   a hit returns it memory-mapped, read only.
+#   Files are written to a temporary name and renamed,
+#   so processes sharing the directory never read a partial maze.
+#   The least recently used mazes are deleted when the directory
+#   is larger than max_bytes.
+
+import os
+import random
+import numpy as np
+import mazelib as ml
+
+# Mode of the cached mazes (before the umask of the process)
+FILE_MODE = 0o644
+
+
+
+
+class MazeCache:
+    """
+    Size-bounded directory of generated mazes with LRU eviction.
+    """
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        """
+        Opens (and creates) the cache directory.
+
+        Parameters:
+        directory (str): The cache directory.
+        max_bytes (int): The maximum total size of the cached mazes. Default is 1 GiB.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, algorithm, height, width, seed):
+        """
+        Returns the path of the cached maze.
+
+        Parameters:
+        algorithm (str): The name of the algorithm (see mazelib.generators).
+        height (int): Height of the maze.
+        width (int): Width of the maze.
+        seed (int): The random seed.
+
+        Returns:
+        str: The path of the .npy file.
+        """
+        return os.path.join(self.directory, f"{algorithm}-{height}x{width}-{seed}.npy")
+
+    def get(self, algorithm, height, width, seed):
+        """
+        Returns the cached maze, or None if it is not in the cache.
+
+        Parameters:
+        algorithm (str): The name of the algorithm (see mazelib.generators).
+        height (int): Height of the maze.
+        width (int): Width of the maze.
+        seed (int): The random seed.
+
+        Returns:
+        numpy.memmap or None: The (height, width) maze, memory-mapped read only.
+        """
+        path = self.path(algorithm, height, width, seed)
+        try:
+            maze = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return maze
+
+    def put(self, algorithm, height, width, seed, maze):
+        """
+        Stores a maze in the cache (atomic write), then evicts old mazes if needed.
+
+        Parameters:
+        algorithm (str): The name of the algorithm (see mazelib.generators).
+        height (int): Height of the maze.
+        width (int): Width of the maze.
+        seed (int): The random seed.
+        maze (list of list or ndarray): The maze.
+
+        Returns:
+        str: The path of the cached maze.
+        """
+        path = self.path(algorithm, height, width, seed)
+
+        # Write a temporary file in the same directory (unique name,
+        # created with the mode of a new file), then rename it
+        tmp_path = os.path.join(self.directory, f".{os.getpid()}-{os.urandom(8).hex()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, FILE_MODE)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                np.save(fp, ml.maze_to_array(maze))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self.evict()
+        return path
+
+    def generate(self, algorithm, height, width, seed):
+        """
+        Returns the maze from the cache, generating and storing it on a miss.
+        The maze depends only on the arguments: the generator runs
+        with its own seed and the global random state is restored.
+
+        Parameters:
+        algorithm (str): The name of the algorithm (see mazelib.generators).
+        height (int): Height of the maze.
+        width (int): Width of the maze.
+        seed (int): The random seed.
+
+        Returns:
+        numpy.memmap: The (height, width) maze, memory-mapped read only.
+        """
+        maze = self.get(algorithm, height, width, seed)
+        if maze is not None:
+            return maze
+
+        # Generate with the given seed
+        state = random.getstate()
+        try:
+            random.seed(seed)
+            maze = ml.generators[algorithm](height, width)
+        finally:
+            random.setstate(state)
+
+        path = self.put(algorithm, height, width, seed, maze)
+        try:
+            return np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            # Evicted at once (cache smaller than the maze)
+            return ml.maze_to_array(maze)
+
+    def evict(self):
+        """
+        Deletes the least recently used mazes until the cache fits in max_bytes.
+        """
+        entries = []
+        total   = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.npy'):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+        # Oldest first
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+
+# Maze Editing
+# ----------------------------------------------------------------
+#   Edits walls of a maze in place and keeps the connected regions
+#   up to date, so "are these two cells connected" is one lookup.
+#
+#   open  : if the two cells were in different regions, the smaller
+#           region is flooded and relabelled (small into large).
+#   close : two searches run in turn from both sides of the wall;
+#           if they meet, nothing changes, otherwise the side that is
+#           exhausted first (the smaller one) becomes a new region.
+#
+#   Cells are identified by their id: y*width + x.
+
+from collections import deque
+import numpy as np
+import mazelib as ml
+
+
+
+
+class MazeEditor:
+    """
+    In-place wall editing with incremental region labels.
+    """
+
+    def __init__(self, maze):
+        """
+        Labels the regions of the maze (one union-find pass).
+
+        Parameters:
+        maze (list of list or ndarray): The maze, edited in place.
+        """
+        self.maze   = maze
+        self.height = len(maze)
+        self.width  = len(maze[0])
+
+        # Initial regions: components of the passages
+        cells = ml.maze_to_array(maze)
+        ids   = np.arange(self.height * self.width).reshape(self.height, self.width)
+        mask  = ml.open_mask(cells)
+        u = np.concatenate([ids[:-1, :][mask[:-1, :, ml.iS]], ids[:, :-1][mask[:, :-1, ml.iE]]])
+        v = np.concatenate([ids[1:, :][mask[:-1, :, ml.iS]],  ids[:, 1:][mask[:, :-1, ml.iE]]])
+        self.labels = ml.connected_components(self.height * self.width, u, v)
+
+        # Size of each region, next free label
+        self.sizes = dict(zip(*(x.tolist() for x in np.unique(self.labels, return_counts=True))))
+        self.next_label = self.height * self.width
+
+    def neighbors(self, cell_id):
+        """
+        Returns the ids of the cells reachable from a cell in one move.
+        """
+        y, x = divmod(cell_id, self.width)
+        cell = self.maze[y][x]
+        result = []
+        for iDIR, (dx, dy) in enumerate(ml.directions):
+            nx, ny = x + dx, y + dy
+            if not ml.has_wall(cell, iDIR) and 0 <= nx < self.width and 0 <= ny < self.height:
+                result.append(ny * self.width + nx)
+        return result
+
+    def flood(self, cell_id):
+        """
+        Returns the ids of the cells of the region of a cell (breadth-first).
+        """
+        seen  = {cell_id}
+        queue = deque([cell_id])
+        while queue:
+            for n in self.neighbors(queue.popleft()):
+                if n not in seen:
+                    seen.add(n)
+                    queue.append(n)
+        return seen
+
+    def open_wall(self, x, y, iDIR):
+        """
+        Removes the wall between (x, y) and its neighbor in direction iDIR,
+        merging their regions.
+
+        Returns:
+        bool: True if the wall was removed.
+        """
+        nx, ny = ml.move_from(x, y, iDIR, 1)
+        if not ml.is_valid(self.maze, nx, ny) or not ml.has_wall(self.maze[y][x], iDIR):
+            return False
+        a = y * self.width + x
+        b = ny * self.width + nx
+        la, lb = int(self.labels[a]), int(self.labels[b])
+
+        # Relabel the smaller region into the larger one
+        # (flooded before the wall is opened)
+        if la != lb:
+            if self.sizes[la] < self.sizes[lb]:
+                la, lb = lb, la
+                b = a
+            self.labels[list(self.flood(b))] = la
+            self.sizes[la] += self.sizes.pop(lb)
+
+        ml.open_wall(self.maze, x, y, iDIR)
+        return True
+
+    def close_wall(self, x, y, iDIR):
+        """
+        Sets the wall between (x, y) and its neighbor in direction iDIR,
+        splitting their region if it was the only way between them.
+
+        Returns:
+        bool: True if the wall was set.
+        """
+        if not ml.close_wall(self.maze, x, y, iDIR):
+            return False
+        nx, ny = ml.move_from(x, y, iDIR, 1)
+        a = y * self.width + x
+        b = ny * self.width + nx
+
+        # Search from both sides in turn, stop when they meet
+        seen  = ({a}, {b})
+        queue = (deque([a]), deque([b]))
+        while queue[0] and queue[1]:
+            for side in (0, 1):
+                for n in self.neighbors(queue[side].popleft()):
+                    if n in seen[1-side]:
+                        return True
+                    if n not in seen[side]:
+                        seen[side].add(n)
+                        queue[side].append(n)
+
+        # The exhausted side is a new region
+        side   = 0 if not queue[0] else 1
+        region = list(seen[side])
+        old    = int(self.labels[region[0]])
+        self.labels[region] = self.next_label
+        self.sizes[self.next_label] = len(region)
+        self.sizes[old] -= len(region)
+        self.next_label += 1
+        return True
+
+    def toggle_wall(self, x, y, iDIR):
+        """
+        Opens the wall if it is set, closes it otherwise.
+
+        Returns:
+        bool: True if the wall was changed.
+        """
+        if ml.has_wall(self.maze[y][x], iDIR):
+            return self.open_wall(x, y, iDIR)
+        return self.close_wall(x, y, iDIR)
+
+    def connected(self, x1, y1, x2, y2):
+        """
+        Returns True if the cells (x1, y1) and (x2, y2) are connected.
+        """
+        return self.labels[y1 * self.width + x1] == self.labels[y2 * self.width + x2]
+
+    def region(self, x, y):
+        """
+        Returns the label of the region of the cell (x, y).
+        """
+        return int(self.labels[y * self.width + x])
+
+    def region_size(self, x, y):
+        """
+        Returns the number of cells of the region of the cell (x, y).
+        """
+        return self.sizes[self.region(x, y)]
@@ -2,11 +2,19 @@
 
 
 
+import io
 import os
+import sys
+import time
 import random
+import argparse
+import tempfile
 from datetime import datetime
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+import numpy as np
+from frameio import FrameArchiveWriter, ARCHIVE_EXT
+
+# matplotlib is imported on first use (see load_pyplot),
+# generating mazes does not need it
 
 
 
@@ -49,8 +57,29 @@ iN, iW, iS, iE  = 0, 1, 2, 3
 #   b1  : W wall
 #   b2  : S wall
 #   b3  : E wall
+#
+# A maze returned by the generators has only the wall bits.
+#
+# Spare bits, used by some generators while carving
+# (and cleared before the maze is returned)
+#   b4-b5 : direction to the parent cell
+
+# Parent direction (2 bits) of gen_random_dfs_low_memory
+iPARENT = 4
 
 
+# Overlay Implementation
+# ----------------------------------------------------------------
+#   The state shown while a maze is generated lives in
+#   a separate grid: the overlay, a list of bytearrays
+#   (one byte per cell), indexed as overlay[y][x] like the maze.
+#   It is created only when the generation is visualized.
+#   The overlay bits are the ones above the wall bits,
+#   so (maze[y][x] | overlay[y][x]) is the cell as drawn
+#   and the is_/set_/remove_ functions below work on both.
+#
+# Overlay bit codes
+
 # Current cell on generation algorithms
 iCURR   = 4
 
@@ -73,7 +102,7 @@ iBACK   = 7
 
 def init_maze(height, width):
     """
-    Initialize the maze grid with all walls and dark cells.
+    Initialize the maze grid with all walls.
 
     Parameters:
     height (int): The number of rows in the maze.
@@ -85,7 +114,6 @@ def init_maze(height, width):
 
     # Define a variable representing all walls using bitwise OR to combine wall values
     all_walls   = (1 << iN) | (1 << iW) | (1 << iS) | (1 << iE)
-    all_walls  |= (1 << iDARK)
 
     # Create the maze grid as a 2D list with all cells initialized to have all walls
     maze = [[all_walls] * width for _ in range(height)]
@@ -95,6 +123,122 @@ def init_maze(height, width):
 
 
 
+def init_overlay(height, width):
+    """
+    Initialize the overlay grid with all dark cells.
+
+    Parameters:
+    height (int): The number of rows in the maze.
+    width (int): The number of columns in the maze.
+
+    Returns:
+    list: A list of bytearrays, one byte of overlay bits per cell.
+    """
+    return [bytearray([1 << iDARK]) * width for _ in range(height)]
+
+
+
+def init_visited(height, width):
+    """
+    Initialize the visited grid of the generation algorithms (nothing visited).
+
+    Parameters:
+    height (int): The number of rows in the maze.
+    width (int): The number of columns in the maze.
+
+    Returns:
+    list: A list of bytearrays, one byte per cell, 1 if visited.
+    """
+    return [bytearray(width) for _ in range(height)]
+
+
+
+def init_maze_file(path, height, width):
+    """
+    Initialize a maze grid with all walls, stored in a memory-mapped .npy file.
+    Cells are read and written in place on disk, the OS page cache
+    keeps the working set in memory, so the maze can be larger than the RAM.
+    The generators accept it as their maze argument.
+    The file is a standard numpy array: load it with load_maze_file or numpy.load.
+
+    Parameters:
+    path (str): The path of the .npy file (overwritten).
+    height (int): The number of rows in the maze.
+    width (int): The number of columns in the maze.
+
+    Returns:
+    numpy.memmap: A (height, width) uint8 memory-mapped maze.
+    """
+    all_walls   = (1 << iN) | (1 << iW) | (1 << iS) | (1 << iE)
+
+    # Create the file and fill it with all walls, a block of rows at a time
+    maze = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(height, width))
+    rows = max(1, (1 << 24) // max(width, 1))
+    for y in range(0, height, rows):
+        maze[y:y+rows] = all_walls
+
+    return maze
+
+
+
+def load_maze_file(path, mode='r'):
+    """
+    Opens a maze stored in a .npy file, memory-mapped.
+
+    Parameters:
+    path (str): The path of the .npy file.
+    mode (str): 'r' read only, 'r+' read and write.
+
+    Returns:
+    numpy.memmap: The (height, width) memory-mapped maze.
+    """
+    return np.load(path, mmap_mode=mode)
+
+
+
+def init_visited_like(maze):
+    """
+    Initialize the visited grid for a maze, in the same kind of storage:
+    lists for a list maze, an array for an array maze,
+    a temporary memory-mapped file for a memory-mapped maze.
+
+    Parameters:
+    maze (list of list or ndarray): The maze.
+
+    Returns:
+    list or ndarray: The visited grid (nothing visited), indexed as visited[y][x].
+    """
+    height  = len(maze)
+    width   = len(maze[0])
+
+    if isinstance(maze, np.memmap):
+        # Deleted when the array is released
+        return np.memmap(tempfile.TemporaryFile(dir=os.path.dirname(maze.filename)),
+                         dtype=np.uint8, mode='w+', shape=(height, width))
+    if isinstance(maze, np.ndarray):
+        return np.zeros((height, width), dtype=np.uint8)
+    return init_visited(height, width)
+
+
+
+def merge_overlay(maze, overlay):
+    """
+    Combines the maze walls and the overlay into the cells as drawn.
+
+    Parameters:
+    maze (list of list): A 2D list representing the maze.
+    overlay (list of bytearray): The overlay grid.
+
+    Returns:
+    list: A 2D list of cells with both wall and overlay bits.
+    """
+    # Only the wall bits of the maze (spare bits may be in use)
+    walls = (1 << iN) | (1 << iW) | (1 << iS) | (1 << iE)
+    return [[(cell & walls) | flags for cell, flags in zip(row, flags_row)]
+            for row, flags_row in zip(maze, overlay)]
+
+
+
 def random_idir():
     """
     Returns a random index representing a direction from the given list of directions.
@@ -199,8 +343,9 @@ def remove_wall(cell, iDIR):
     Returns:
     int: The updated cell configuration with the wall removed in the specified direction.
     """
-    # Remove the wall in the specified direction using bitwise AND operation
-    cell &= ~(1 << iDIR)
+    # Remove the wall in the specified direction (set it, then flip it)
+    # also valid for the unsigned numpy integers of an array maze
+    cell = (cell | (1 << iDIR)) ^ (1 << iDIR)
     # Return the updated cell
     return cell
 
@@ -208,6 +353,48 @@ def remove_wall(cell, iDIR):
 
 
 
+def get_parent(cell):
+    """
+    Returns the direction to the parent cell stored in the spare bits of a cell.
+
+    Parameters:
+    cell (int): An integer representing the cell's configuration.
+
+    Returns:
+    int: The direction index to the parent cell.
+    """
+    return (cell >> iPARENT) & 3
+
+def set_parent(cell, iDIR):
+    """
+    Stores the direction to the parent cell in the spare bits of a cell.
+
+    Parameters:
+    cell (int): An integer representing the cell's configuration (no parent stored).
+    iDIR (int): The direction index to the parent cell.
+
+    Returns:
+    int: The updated cell configuration.
+    """
+    cell |= (iDIR << iPARENT)
+    return cell
+
+def remove_parent(cell):
+    """
+    Clears the parent direction bits of a cell.
+
+    Parameters:
+    cell (int): An integer representing the cell's configuration.
+
+    Returns:
+    int: The updated cell configuration.
+    """
+    bitmask = 3 << iPARENT
+    cell = (cell | bitmask) ^ bitmask
+    return cell
+
+
+
 def is_current(cell):
     bitmask = 1 << iCURR
     return (cell & bitmask) != 0
@@ -274,12 +461,58 @@ def remove_back(cell):
 
 
 
-def has_unvisited_neighbors(maze, x, y):
+def open_wall(maze, x, y, iDIR):
+    """
+    Removes the wall between a cell and its neighbor in the given direction,
+    on both sides.
+
+    Parameters:
+    maze (list of list or ndarray): The maze (edited in place).
+    x (int): x-coordinate of the cell.
+    y (int): y-coordinate of the cell.
+    iDIR (int): The direction of the wall.
+
+    Returns:
+    bool: True if the wall was removed, False if already open or on the border.
+    """
+    nx, ny = move_from(x, y, iDIR, 1)
+    if not is_valid(maze, nx, ny) or not has_wall(maze[y][x], iDIR):
+        return False
+    maze[y][x]   = remove_wall(maze[y][x], iDIR)
+    maze[ny][nx] = remove_wall(maze[ny][nx], ((iDIR+2)%len(directions)))
+    return True
+
+
+
+def close_wall(maze, x, y, iDIR):
+    """
+    Sets the wall between a cell and its neighbor in the given direction,
+    on both sides.
+
+    Parameters:
+    maze (list of list or ndarray): The maze (edited in place).
+    x (int): x-coordinate of the cell.
+    y (int): y-coordinate of the cell.
+    iDIR (int): The direction of the wall.
+
+    Returns:
+    bool: True if the wall was set, False if already set or on the border.
+    """
+    nx, ny = move_from(x, y, iDIR, 1)
+    if not is_valid(maze, nx, ny) or has_wall(maze[y][x], iDIR):
+        return False
+    maze[y][x]   = set_wall(maze[y][x], iDIR)
+    maze[ny][nx] = set_wall(maze[ny][nx], ((iDIR+2)%len(directions)))
+    return True
+
+
+
+def has_unvisited_neighbors(visited, x, y):
     """
     Checks if the given cell has unvisited neighbors in the maze.
 
     Args:
-    maze (list): 2D list representing the maze.
+    visited (list): Visited grid of the maze (see init_visited).
     x (int): x-coordinate of the cell.
     y (int): y-coordinate of the cell.
 
@@ -295,18 +528,18 @@ def has_unvisited_neighbors(maze, x, y):
     # Iterate over directions to check for unvisited neighbors
     for iDIR in iDIR_list:
         nx, ny = move_from(x, y, iDIR, 1)  # Get coordinates of the neighbor
-        if is_valid(maze, nx, ny) and is_dark(maze[ny][nx]):  # Check validity and unvisited status
+        if is_valid(visited, nx, ny) and not visited[ny][nx]:  # Check validity and unvisited status
             return iDIR, nx, ny  # Return direction and coordinates of unvisited neighbor
     return False  # Return False if no unvisited neighbor found
 
 
             
-def has_visited_neighbors(maze, x, y):
+def has_visited_neighbors(visited, x, y):
     """
     Checks if the given cell has visited neighbors in the maze.
 
     Args:
-    maze (list): 2D list representing the maze.
+    visited (list): Visited grid of the maze (see init_visited).
     x (int): x-coordinate of the cell.
     y (int): y-coordinate of the cell.
 
@@ -322,7 +555,7 @@ def has_visited_neighbors(maze, x, y):
     # Iterate over directions to check for visited neighbors
     for iDIR in iDIR_list:
         nx, ny = move_from(x, y, iDIR, 1)  # Get coordinates of the neighbor
-        if is_valid(maze, nx, ny) and not is_dark(maze[ny][nx]):  # Check validity and visited status
+        if is_valid(visited, nx, ny) and visited[ny][nx]:  # Check validity and visited status
             return iDIR, nx, ny  # Return direction and coordinates of visited neighbor
     return False  # Return False if no visited neighbor found
 
@@ -334,6 +567,45 @@ def has_visited_neighbors(maze, x, y):
 # Maze Display
 # ----------------------------------------------------------------
 
+# Cell parameters (drawing units)
+cell_height = 10
+cell_width  = 10
+
+# Maze display parameters
+bg_col      = '#f7f7f7'     # Color for background
+curr_col    = '#ff2d38'     # Color for current cell
+high_col    = '#2e43ff'     # Color for highlighted cell
+back_col    = '#d8f59f'     # Color for backtracking cell
+dark_col    = '#ababab'     # Color for dark cell
+wall_thick  = 2             # wall thickness  
+wall_col    = '#000000'     # Color for walls
+
+# Smallest cell (in pixels) drawn with its walls, smaller cells are rasterized
+min_cell_pixels = 4
+
+
+
+def load_pyplot():
+    """
+    Imports matplotlib.pyplot on first use.
+    Without a display (and without MPLBACKEND set) the Agg backend is used,
+    so no GUI toolkit is loaded.
+
+    Returns:
+    module: matplotlib.pyplot
+    """
+    if 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        headless = (sys.platform.startswith('linux')
+                    and not os.environ.get('DISPLAY')
+                    and not os.environ.get('WAYLAND_DISPLAY'))
+        if headless and 'MPLBACKEND' not in os.environ:
+            matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+
 def print_maze(maze, space=4):
     """
     Prints a 2D list (maze) in a formatted manner.
@@ -398,101 +670,40 @@ def print_maze_as_ascii(maze):
 
 
 
-def draw_maze(maze):
+def draw_maze(maze, overlay=None, pixels=512):
     """
     Draw into a matplotlib new figure the maze. 
     Draw into ax.
     Do not show the plot.
 
+    The level of detail depends on the size of a cell in the output image:
+    cells of at least min_cell_pixels pixels are drawn with all their walls,
+    smaller cells are drawn as a downsampled raster (see draw_maze_raster).
+
     Parameters:
     maze (list of list): A 2D list where each sublist represents a row in the maze.
                          Each element in the sublist represents a cell in that row.
+    overlay (list of bytearray, optional): The overlay grid to draw over the maze.
+    pixels (int, optional): The size in pixels of the output image. Default is 512.
     """
 
     # Maze params
     height  = len(maze)
     width   = len(maze[0]) 
+
+    # Cells as drawn: walls and overlay
+    if overlay is not None:
+        maze = merge_overlay(maze, overlay)
                         
     # Create a blank figure and axis
+    plt = load_pyplot()
     fig, ax = plt.subplots(figsize=(5, 5))
 
-    # Cell parameters
-    cell_height = 10
-    cell_width  = 10
-
-    # Maze display parameters
-    bg_col      = '#f7f7f7'     # Color for background
-    curr_col    = '#ff2d38'     # Color for current cell
-    high_col    = '#2e43ff'     # Color for highlighted cell
-    back_col    = '#d8f59f'     # Color for backtracking cell
-    dark_col    = '#ababab'     # Color for dark cell
-    wall_thick  = 2             # wall thickness  
-    wall_col    = '#000000'     # Color for walls
-
-    # Iterate over the maze cells
-    for y, row in enumerate(maze):
-        for x, cell in enumerate(row):
-            
-            # Draw the Cell init
-            x1 = (x+1)*cell_width   # top left
-            y1 = (y+1)*cell_height  # 
-            rect = patches.Rectangle((x1, y1), cell_width, cell_height, linewidth=0, edgecolor=None, facecolor=bg_col)
-            ax.add_patch(rect)
-
-            # Overlay special cells
-            if is_back(cell):
-                x1 = (x+1)*cell_width   # top left
-                y1 = (y+1)*cell_height  # 
-                rect = patches.Rectangle((x1, y1), cell_width, cell_height, linewidth=0, edgecolor=None, facecolor=back_col)
-                ax.add_patch(rect)
-            elif is_dark(cell):
-                x1 = (x+1)*cell_width   # top left
-                y1 = (y+1)*cell_height  # 
-                rect = patches.Rectangle((x1, y1), cell_width, cell_height, linewidth=0, edgecolor=None, facecolor=dark_col)
-                ax.add_patch(rect)
-
-            if is_high(cell):
-                margin_w    = 0.2*cell_width
-                margin_h    = 0.2*cell_height
-                x1 = (x+1)*cell_width   + margin_w  # top left
-                y1 = (y+1)*cell_height  + margin_h  # 
-                rect = patches.Rectangle((x1, y1), cell_width-2*margin_w, cell_height-2*margin_h, linewidth=0, edgecolor=None, facecolor=high_col)
-                ax.add_patch(rect)
-            elif is_current(cell):
-                margin_w    = 0.1*cell_width
-                margin_h    = 0.1*cell_height
-                x1 = (x+1)*cell_width   + margin_w  # top left
-                y1 = (y+1)*cell_height  + margin_h  # 
-                rect = patches.Rectangle((x1, y1), cell_width-2*margin_w, cell_height-2*margin_h, linewidth=0, edgecolor=None, facecolor=curr_col)
-                ax.add_patch(rect)
-
-            
-
-            # Draw the Cell Walls
-            if has_wall(cell, iN):
-                x1  = (x+1)*cell_width  # top left
-                y1  = (y+1)*cell_height # 
-                x2  = (x+2)*cell_width  # bottom right
-                y2  = (y+1)*cell_height # 
-                ax.plot([x1,x2], [y1,y2], color=wall_col, linewidth=wall_thick, marker=None)
-            if has_wall(cell, iW):
-                x1  = (x+1)*cell_width  # top left
-                y1  = (y+1)*cell_height # 
-                x2  = (x+1)*cell_width  # bottom right
-                y2  = (y+2)*cell_height # 
-                ax.plot([x1,x2], [y1,y2], color=wall_col, linewidth=wall_thick, marker=None)
-            if has_wall(cell, iS):
-                x1  = (x+1)*cell_width  # top left
-                y1  = (y+2)*cell_height # 
-                x2  = (x+2)*cell_width  # bottom right
-                y2  = (y+2)*cell_height # 
-                ax.plot([x1,x2], [y1,y2], color=wall_col, linewidth=wall_thick, marker=None)
-            if has_wall(cell, iE):
-                x1  = (x+2)*cell_width  # top left
-                y1  = (y+1)*cell_height # 
-                x2  = (x+2)*cell_width  # bottom right
-                y2  = (y+2)*cell_height # 
-                ax.plot([x1,x2], [y1,y2], color=wall_col, linewidth=wall_thick, marker=None)
+    # Level of detail from the cell size in pixels
+    if pixels / max(height, width) >= min_cell_pixels:
+        draw_maze_walls(ax, maze)
+    else:
+        draw_maze_raster(ax, maze, pixels)
 
     # Set the aspect ratio
     ax.set_aspect('equal')
@@ -507,12 +718,222 @@ def draw_maze(maze):
 
 
 
+def draw_maze_walls(ax, maze):
+    """
+    Draw into ax the maze, with all the walls.
+    The cells are filled by one collection of rectangles (the background,
+    then the cells by state), the walls drawn by one collection of lines
+    (see wall_segments), so the artists do not grow with the maze.
+
+    Parameters:
+    ax (Axes): The matplotlib axis.
+    maze (list of list or ndarray): A 2D list where each sublist represents a row in the maze.
+                                    Each element in the sublist represents a cell in that row.
+    """
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    # Maze params
+    cells   = np.asarray(maze, dtype=np.int64)
+    height, width = cells.shape
+
+    def is_set(iBIT):
+        return (cells >> iBIT) & 1 == 1
+
+    def rects(mask, margin):
+        # Corners of the cells of the mask, inset by margin (fraction of the cell)
+        y, x  = np.nonzero(mask)
+        x0    = (x + 1 + margin) * cell_width
+        y0    = (y + 1 + margin) * cell_height
+        x1    = (x + 2 - margin) * cell_width
+        y1    = (y + 2 - margin) * cell_height
+        return np.stack([np.stack([x0, y0], axis=1), np.stack([x1, y0], axis=1),
+                         np.stack([x1, y1], axis=1), np.stack([x0, y1], axis=1)], axis=1)
+
+    # Cell states, drawn in order: backtrack over dark, highlighted over current
+    back    = is_set(iBACK)
+    high    = is_set(iHIGH)
+    layers  = [(back, 0.0, back_col),
+               (is_set(iDARK) & ~back, 0.0, dark_col),
+               (high, 0.2, high_col),
+               (is_set(iCURR) & ~high, 0.1, curr_col)]
+
+    # Background: one rectangle over the whole maze
+    verts   = [np.array([[[cell_width, cell_height], [(width+1)*cell_width, cell_height],
+                          [(width+1)*cell_width, (height+1)*cell_height],
+                          [cell_width, (height+1)*cell_height]]], dtype=float)]
+    colors  = [bg_col]
+    for mask, margin, color in layers:
+        verts.append(rects(mask, margin))
+        colors += [color] * len(verts[-1])
+    ax.add_collection(PolyCollection(np.concatenate(verts), facecolors=colors, linewidths=0))
+
+    # Walls: the merged segments, from cell units to drawing units
+    horizontal, vertical = wall_segments(cells)
+    segments = np.concatenate((horizontal, vertical)).reshape(-1, 2, 2) + 1
+    segments = segments * (cell_width, cell_height)
+    ax.add_collection(LineCollection(segments, colors=wall_col, linewidths=wall_thick,
+                                     capstyle='projecting'))
+    ax.autoscale_view()
+
+
+
+def maze_raster(maze):
+    """
+    Render the maze as an RGB raster of (2*height+1) x (2*width+1) pixels.
+    Like print_maze_as_ascii: one pixel per cell, per wall and per corner.
+    Cell pixels get the color of the cell state (current, backtrack, dark).
+
+    Parameters:
+    maze (list of list): A 2D list where each sublist represents a row in the maze.
+                         Each element in the sublist represents a cell in that row.
+
+    Returns:
+    ndarray: A float32 array (2*height+1, 2*width+1, 3) with values in [0, 1].
+    """
+
+    from matplotlib.colors import to_rgb
+
+    # Maze params
+    cells   = np.asarray(maze, dtype=np.int64)
+    height, width = cells.shape
+
+    # Color of each cell from its state (same priority of draw_maze_walls)
+    cell_rgb = np.empty((height, width, 3), dtype=np.float32)
+    cell_rgb[:]     = to_rgb(bg_col)
+    cell_rgb[(cells >> iDARK) & 1 == 1] = to_rgb(dark_col)
+    cell_rgb[(cells >> iBACK) & 1 == 1] = to_rgb(back_col)
+    cell_rgb[(cells >> iCURR) & 1 == 1] = to_rgb(curr_col)
+    cell_rgb[(cells >> iHIGH) & 1 == 1] = to_rgb(high_col)
+
+    # Walls between cells (a wall is set if any side of it is set)
+    def wall(iDIR):
+        return (cells >> iDIR) & 1 == 1
+    horiz = np.zeros((height+1, width), dtype=bool)
+    horiz[:-1] |= wall(iN)
+    horiz[1:]  |= wall(iS)
+    vert  = np.zeros((height, width+1), dtype=bool)
+    vert[:, :-1] |= wall(iW)
+    vert[:, 1:]  |= wall(iE)
+
+    # Raster: corners are walls, passages take the mean color of their cells
+    raster = np.empty((2*height+1, 2*width+1, 3), dtype=np.float32)
+    raster[:] = to_rgb(wall_col)
+    raster[1::2, 1::2] = cell_rgb
+    raster[2:-1:2, 1::2] = (cell_rgb[:-1] + cell_rgb[1:]) / 2
+    raster[1::2, 2:-1:2] = (cell_rgb[:, :-1] + cell_rgb[:, 1:]) / 2
+    raster[0::2, 1::2][horiz] = to_rgb(wall_col)
+    raster[1::2, 0::2][vert]  = to_rgb(wall_col)
+
+    return raster
+
+
+
+def maze_raster_window(maze, r0, r1, c0, c1):
+    """
+    Render a window of the raster of the maze (see maze_raster),
+    reading only the cells below it.
+
+    Parameters:
+    maze (list of list or ndarray): The maze, e.g. memory-mapped.
+    r0, r1 (int): The raster rows of the window (r1 excluded).
+    c0, c1 (int): The raster columns of the window (c1 excluded).
+
+    Returns:
+    ndarray: A float32 array (r1-r0, c1-c0, 3) with values in [0, 1].
+    """
+    # Lists (or any grid with __array__, e.g. mazeplanes.WallPlanes) as an array,
+    # arrays as they are (a memory-mapped maze is not read)
+    if not isinstance(maze, np.ndarray):
+        maze = np.asarray(maze)
+    height, width = maze.shape
+
+    # Cells below the window, the block edges outside it (or on the maze border)
+    ya, yb  = max(0, (r0 - 1) // 2), min(height, (r1 - 1) // 2 + 1)
+    xa, xb  = max(0, (c0 - 1) // 2), min(width, (c1 - 1) // 2 + 1)
+    cells   = np.asarray(maze[ya:yb, xa:xb], dtype=np.int64)
+    raster  = maze_raster(cells)
+    return raster[r0 - 2*ya:r1 - 2*ya, c0 - 2*xa:c1 - 2*xa]
+
+
+
+def downsample(raster, factor):
+    """
+    Downsample a raster by averaging blocks of factor x factor pixels.
+
+    Parameters:
+    raster (ndarray): A (H, W, C) array.
+    factor (int): The size of the blocks.
+
+    Returns:
+    ndarray: A (ceil(H/factor), ceil(W/factor), C) array.
+    """
+    if factor <= 1:
+        return raster
+
+    # Pad (repeating the border) to a multiple of factor
+    H, W, C = raster.shape
+    pad_h   = -H % factor
+    pad_w   = -W % factor
+    raster  = np.pad(raster, ((0, pad_h), (0, pad_w), (0, 0)), mode='edge')
+
+    # Mean over the blocks
+    blocks  = raster.reshape((H+pad_h)//factor, factor, (W+pad_w)//factor, factor, C)
+    return blocks.mean(axis=(1, 3))
+
+
+
+def draw_maze_raster(ax, maze, pixels=512):
+    """
+    Draw into ax the maze as an image, for cells smaller than min_cell_pixels.
+    The wall raster (see maze_raster) is averaged down to at most pixels,
+    so each output pixel shows the passage density and the state of the cells below it.
+    The raster is built and averaged one band of rows at a time,
+    so the memory depends on the output size, not on the maze size.
+    The coordinates are the same of draw_maze_walls.
+
+    Parameters:
+    ax (Axes): The matplotlib axis.
+    maze (list of list or ndarray): A 2D list where each sublist represents a row in the maze.
+                                    Each element in the sublist represents a cell in that row.
+    pixels (int, optional): The size in pixels of the output image. Default is 512.
+    """
+
+    # Maze params
+    height  = len(maze)
+    width   = len(maze[0]) 
+
+    # Converted once, not once per band
+    if not isinstance(maze, np.ndarray):
+        maze = np.asarray(maze)
+
+    # Raster size and block size to get (at most) the output resolution
+    raster_h = 2*height + 1
+    raster_w = 2*width + 1
+    factor   = -(-max(raster_h, raster_w) // pixels)
+
+    # Output rows per band (about 16 MB of raster per band)
+    band     = max(1, (1 << 24) // (factor * raster_w * 3 * 4))
+
+    # Average each band of raster rows into its output rows
+    out_h    = -(-raster_h // factor)
+    raster   = np.empty((out_h, -(-raster_w // factor), 3), dtype=np.float32)
+    for i in range(0, out_h, band):
+        rows = maze_raster_window(maze, i*factor, min(raster_h, (i + band)*factor), 0, raster_w)
+        raster[i:i+band] = downsample(rows, factor)
+
+    # Same extent of the cells drawn by draw_maze_walls (y axis inverted later)
+    ax.imshow(raster, origin='lower', interpolation='nearest',
+              extent=(cell_width, (width+1)*cell_width, cell_height, (height+1)*cell_height))
+
+
+
 def show_plt():
     """
     Show the current plot.
     """
 
     # Show
+    plt = load_pyplot()
     plt.show()
 
 
@@ -530,6 +951,7 @@ def save_plt(outdir, fname):
     # DPI = pixels/inches
 
     # Get the size of the figure in inches
+    plt = load_pyplot()
     fig = plt.gcf()
     fig_width, fig_height = fig.get_size_inches()
     dpi = 665/fig_width # tricky, empirical number to get 512 pixels
@@ -569,6 +991,51 @@ def create_output_dir(prefix=""):
 
 
 
+def save_plt_frame(archive):
+    """
+    Save the current figure of the maze as the next frame of a frame archive.
+    Same 512x512 pixel image of save_plt, PNG encoded with fast compression.
+
+    Parameters:
+    archive (FrameArchiveWriter): The frame archive.
+    """
+    # Get the size of the figure in inches
+    plt = load_pyplot()
+    fig = plt.gcf()
+    fig_width, fig_height = fig.get_size_inches()
+    dpi = 665/fig_width # tricky, empirical number to get 512 pixels
+
+    # Encode the figure in memory
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', dpi=dpi, bbox_inches='tight', pad_inches=0,
+                pil_kwargs={'compress_level': 1})
+
+    # Close the figure
+    plt.close()
+
+    # Append the frame
+    archive.append(buf.getvalue())
+
+
+
+def create_output_archive(prefix=""):
+    """
+    Creates a frame archive with a timestamp as the name.
+
+    Args:
+    prefix (str): Prefix for the archive name.
+
+    Returns:
+    FrameArchiveWriter: The opened frame archive.
+    """
+    # Get the current time as a formatted string
+    current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+
+    # Return the archive named by the prefix and current time
+    return FrameArchiveWriter(f"{prefix}{current_time}{ARCHIVE_EXT}")
+
+
+
 
 
 
@@ -584,9 +1051,14 @@ def create_output_dir(prefix=""):
 # Aldous-Broder
 # Hunt-and-Kill
 # Randomized Depth-First-Search
+# Randomized Depth-First-Search (low memory, no stack)
+# Recursive Division
+# Cellular Automata (Maze, Mazectric)
 # ----------------------------------------------------------------
+# The overlay (current, dark, highlighted, backtracked cells)
+# is created and updated only if save_gen.
 
-def gen_binary_tree_se(height, width, save_gen=False):
+def gen_binary_tree_se(height, width, save_gen=False, maze=None):
     """
     Generates a maze using Binary-Tree algorithm.
     For every cell flip a coin for South-East.
@@ -597,33 +1069,32 @@ def gen_binary_tree_se(height, width, save_gen=False):
     height (int): Height of the maze grid.
     width (int): Width of the maze grid.
     save_gen (bool): Save images of the generation
+    maze (list of list or ndarray, optional): Grid with all walls to carve,
+        e.g. a memory-mapped maze from init_maze_file. Default is a new init_maze.
 
     Returns:
     list: 2D list representing the generated maze.
     """
-    # Create the output_dir if save_gen
+    # Create the frame archive and the overlay if save_gen
     if save_gen:
-        output_dir = create_output_dir("gen_maze_")
+        archive = create_output_archive("gen_maze_")
+        overlay = init_overlay(height, width)
     
-    # Init maze with all walls and dark cells
-    maze    = init_maze(height, width)
+    # Init maze with all walls (if not given)
+    if maze is None:
+        maze    = init_maze(height, width)
    
     # Main gen loop
     for y in range(height):
         for x in range(width):
 
-            # Mark the cell as current
-            maze[y][x] = set_current(maze[y][x])
-
             # Save before wall removal
             # ----------------
             if save_gen:
-                draw_maze(maze)
-                # Get current time with milliseconds
-                current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-                # Construct filename with current time
-                filename = f"{current_time}.png"
-                save_plt(output_dir, filename)
+                # Mark the cell as current
+                overlay[y][x] = set_current(overlay[y][x])
+                draw_maze(maze, overlay)
+                save_plt_frame(archive)
 
             # Select the wall to remove
             # if not the last column or row
@@ -653,37 +1124,29 @@ def gen_binary_tree_se(height, width, save_gen=False):
             # Save after wall removal
             # ----------------
             if save_gen:
-                draw_maze(maze)
-                # Get current time with milliseconds
-                current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-                # Construct filename with current time
-                filename = f"{current_time}.png"
-                save_plt(output_dir, filename)
+                draw_maze(maze, overlay)
+                save_plt_frame(archive)
 
-
-            # Remove the current flag
-            maze[y][x] = remove_current(maze[y][x])
-            # Remove the dark flag
-            maze[y][x] = remove_dark(maze[y][x])
+                # Remove the current and the dark flags
+                overlay[y][x] = remove_current(overlay[y][x])
+                overlay[y][x] = remove_dark(overlay[y][x])
 
 
 
     # Save last img: clean maze
     # ----------------
     if save_gen:
-        draw_maze(maze)
-        # Get current time with milliseconds
-        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-        # Construct filename with current time
-        filename = f"{current_time}.png"
-        save_plt(output_dir, filename)
+        draw_maze(maze, overlay)
+        save_plt_frame(archive)
+        # Write the archive index
+        archive.close()
 
     # Return
     return maze
 
 
 
-def gen_aldous_broder(height, width, save_gen=False):
+def gen_aldous_broder(height, width, save_gen=False, maze=None):
     """
     Generates a maze using Aldous-Broder algorithm.
     Pick a random cell as the current cell and mark it as visited.
@@ -701,27 +1164,30 @@ def gen_aldous_broder(height, width, save_gen=False):
     height (int): Height of the maze grid.
     width (int): Width of the maze grid.
     save_gen (bool): Save images of the generation
+    maze (list of list or ndarray, optional): Grid with all walls to carve,
+        e.g. a memory-mapped maze from init_maze_file. Default is a new init_maze.
 
     Returns:
     list: 2D list representing the generated maze.
     """
 
-    # Create the output_dir if save_gen
+    # Create the frame archive and the overlay if save_gen
     if save_gen:
-        output_dir = create_output_dir("gen_maze_")
+        archive = create_output_archive("gen_maze_")
+        overlay = init_overlay(height, width)
     
-    # Init maze with all walls and dark cells
-    maze    = init_maze(height, width)
+    # Init maze with all walls (if not given) and the visited grid
+    if maze is None:
+        maze    = init_maze(height, width)
+    visited = init_visited_like(maze)
 
 
     # Start from a random cell
     x = random.randint(0, width - 1)
     y = random.randint(0, height - 1)
 
-    # Mark the cell as current
-    maze[y][x] = set_current(maze[y][x])
-    # Remove the dark flag
-    maze[y][x] = remove_dark(maze[y][x])
+    # Mark the cell as visited
+    visited[y][x] = 1
 
     # Counter of remaining (not visited) cells
     remaining = width * height - 1
@@ -729,12 +1195,11 @@ def gen_aldous_broder(height, width, save_gen=False):
     # Save before wall removal
     # ----------------
     if save_gen:
-        draw_maze(maze)
-        # Get current time with milliseconds
-        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-        # Construct filename with current time
-        filename = f"{current_time}.png"
-        save_plt(output_dir, filename)
+        # Mark the cell as current, remove the dark flag
+        overlay[y][x] = set_current(overlay[y][x])
+        overlay[y][x] = remove_dark(overlay[y][x])
+        draw_maze(maze, overlay)
+        save_plt_frame(archive)
 
 
     # Main loop
@@ -749,51 +1214,42 @@ def gen_aldous_broder(height, width, save_gen=False):
         # Check if it is a valid cell 
         if is_valid(maze, nx, ny):
 
-            # Remove the current flag
-            maze[y][x] = remove_current(maze[y][x])
-
             # Check if the neighbor is not visited
-            if is_dark(maze[ny][nx]):
+            if not visited[ny][nx]:
 
                 # Remove the wall between the current cell and the chosen cell
                 maze[y][x]   = remove_wall(maze[y][x], iDIR)
                 maze[ny][nx] = remove_wall(maze[ny][nx], ((iDIR+2)%len(directions)))
 
-                # Remove the dark flag
-                maze[ny][nx] = remove_dark(maze[ny][nx])
+                # Mark the neighbor as visited
+                visited[ny][nx] = 1
 
                 # Update the remaining cells
                 remaining -= 1
 
-            # Update coord with valid cell anyway
-            x, y = nx, ny
-
-            # Mark the cell as current
-            maze[y][x] = set_current(maze[y][x])
-
             # Save after step move
             # ----------------
             if save_gen:
-                draw_maze(maze)
-                # Get current time with milliseconds
-                current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-                # Construct filename with current time
-                filename = f"{current_time}.png"
-                save_plt(output_dir, filename)
+                # Move the current flag, remove the dark flag
+                overlay[y][x]   = remove_current(overlay[y][x])
+                overlay[ny][nx] = set_current(overlay[ny][nx])
+                overlay[ny][nx] = remove_dark(overlay[ny][nx])
+                draw_maze(maze, overlay)
+                save_plt_frame(archive)
 
+            # Update coord with valid cell anyway
+            x, y = nx, ny
 
-    # Remove the last current flag
-    maze[y][x] = remove_current(maze[y][x])
 
     # Save last img: clean maze
     # ----------------
     if save_gen:
-        draw_maze(maze)
-        # Get current time with milliseconds
-        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-        # Construct filename with current time
-        filename = f"{current_time}.png"
-        save_plt(output_dir, filename)
+        # Remove the last current flag
+        overlay[y][x] = remove_current(overlay[y][x])
+        draw_maze(maze, overlay)
+        save_plt_frame(archive)
+        # Write the archive index
+        archive.close()
 
     # Return
     return maze
@@ -803,7 +1259,7 @@ def gen_aldous_broder(height, width, save_gen=False):
 
 
 
-def gen_hunt_and_kill(height, width, save_gen=False):
+def gen_hunt_and_kill(height, width, save_gen=False, maze=None):
     """
     Generates a maze using Hunt-and-Kill algorithm.
     Perform a random walk, 
@@ -817,37 +1273,44 @@ def gen_hunt_and_kill(height, width, save_gen=False):
     height (int): Height of the maze grid.
     width (int): Width of the maze grid.
     save_gen (bool): Save images of the generation
+    maze (list of list or ndarray, optional): Grid with all walls to carve,
+        e.g. a memory-mapped maze from init_maze_file. Default is a new init_maze.
 
     Returns:
     list: 2D list representing the generated maze.
     """
 
-    # Create the output_dir if save_gen
+    # Create the frame archive and the overlay if save_gen
     if save_gen:
-        output_dir = create_output_dir("gen_maze_")
+        archive = create_output_archive("gen_maze_")
+        overlay = init_overlay(height, width)
     
-    # Init maze with all walls and dark cells
-    maze    = init_maze(height, width)
+    # Init maze with all walls (if not given) and the visited grid
+    if maze is None:
+        maze    = init_maze(height, width)
+    visited = init_visited_like(maze)
 
     # Start from a random cell
     x = random.randint(0, width - 1)
     y = random.randint(0, height - 1)
 
-    # Mark the cell as current
-    maze[y][x] = set_current(maze[y][x])
-    # Remove the dark flag
-    maze[y][x] = remove_dark(maze[y][x])
+    # Count of unvisited cells of each row (rows to skip in hunt mode)
+    row_unvisited = [width] * height
+    first_row     = 0
+
+    # Mark the cell as visited
+    visited[y][x] = 1
+    row_unvisited[y] -= 1
 
 
     # Save before wall removal
     # ----------------
     if save_gen:
-        draw_maze(maze)
-        # Get current time with milliseconds
-        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-        # Construct filename with current time
-        filename = f"{current_time}.png"
-        save_plt(output_dir, filename)
+        # Mark the cell as current, remove the dark flag
+        overlay[y][x] = set_current(overlay[y][x])
+        overlay[y][x] = remove_dark(overlay[y][x])
+        draw_maze(maze, overlay)
+        save_plt_frame(archive)
 
 
     # End flag
@@ -856,7 +1319,7 @@ def gen_hunt_and_kill(height, width, save_gen=False):
     while not maze_completed:
 
         # check the mode for the next run
-        kill_mode = has_unvisited_neighbors(maze, x,y)
+        kill_mode = has_unvisited_neighbors(visited, x,y)
 
         # if cell has unvisited neighbors -> kill mode
         if kill_mode:
@@ -866,33 +1329,30 @@ def gen_hunt_and_kill(height, width, save_gen=False):
             maze[y][x]   = remove_wall(maze[y][x], iDIR)
             maze[ny][nx] = remove_wall(maze[ny][nx], ((iDIR+2)%len(directions)))
 
-            # Remove the current flag
-            maze[y][x] = remove_current(maze[y][x])
-
-            # update coord
-            x, y = nx, ny
-
-            # Mark the cell as current
-            maze[y][x] = set_current(maze[y][x])
-            # Remove the dark flag
-            maze[y][x] = remove_dark(maze[y][x])
+            # Mark the chosen cell as visited
+            visited[ny][nx] = 1
+            row_unvisited[ny] -= 1
 
             # Save after wall removal
             # ----------------
             if save_gen:
-                draw_maze(maze)
-                # Get current time with milliseconds
-                current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-                # Construct filename with current time
-                filename = f"{current_time}.png"
-                save_plt(output_dir, filename)
+                # Move the current flag, remove the dark flag
+                overlay[y][x]   = remove_current(overlay[y][x])
+                overlay[ny][nx] = set_current(overlay[ny][nx])
+                overlay[ny][nx] = remove_dark(overlay[ny][nx])
+                draw_maze(maze, overlay)
+                save_plt_frame(archive)
+
+            # update coord
+            x, y = nx, ny
 
 
         # if cell has NO unvisited neighbors -> hunt mode
         else:
             
             # Remove the current flag
-            maze[y][x] = remove_current(maze[y][x])
+            if save_gen:
+                overlay[y][x] = remove_current(overlay[y][x])
 
             # Scan the grid looking for an unvisited cell 
             # that is adjacent to a visited cell. 
@@ -903,31 +1363,34 @@ def gen_hunt_and_kill(height, width, save_gen=False):
             # just init until a hunting cell is found
             hunt_mode = False
 
-            for hy in range(height):
+            # Start the scan from the first row with unvisited cells:
+            # completed rows (and their pages, for a memory-mapped maze)
+            # are not read again
+            while first_row < height and not row_unvisited[first_row]:
+                first_row += 1
+            if first_row == height:
+                maze_completed = True
+
+            for hy in range(first_row, height):
                 if hunt_mode:
                     break
                 for hx in range(width):
                     if hunt_mode:
                         break
 
-                    # Mark the cell as highlighted
-                    maze[hy][hx] = set_high(maze[hy][hx])
-
                     # Save after hunt step
                     # ----------------
                     if save_gen:
-                        draw_maze(maze)
-                        # Get current time with milliseconds
-                        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-                        # Construct filename with current time
-                        filename = f"{current_time}.png"
-                        save_plt(output_dir, filename)
+                        # Mark the cell as highlighted
+                        overlay[hy][hx] = set_high(overlay[hy][hx])
+                        draw_maze(maze, overlay)
+                        save_plt_frame(archive)
 
                     # unvisited cell 
-                    if is_dark(maze[hy][hx]):
+                    if not visited[hy][hx]:
                         
                         # Check for visited neighbors
-                        hunt_mode = has_visited_neighbors(maze, hx, hy)
+                        hunt_mode = has_visited_neighbors(visited, hx, hy)
 
                         # if visited neighbors found
                         if hunt_mode:
@@ -940,13 +1403,18 @@ def gen_hunt_and_kill(height, width, save_gen=False):
                             # update coord
                             x, y = hx, hy
 
-                            # Mark the cell as current
-                            maze[y][x] = set_current(maze[y][x])
-                            # Remove the dark flag
-                            maze[y][x] = remove_dark(maze[y][x])
+                            # Mark the cell as visited
+                            visited[y][x] = 1
+                            row_unvisited[y] -= 1
+
+                            # Mark the cell as current, remove the dark flag
+                            if save_gen:
+                                overlay[y][x] = set_current(overlay[y][x])
+                                overlay[y][x] = remove_dark(overlay[y][x])
                         
                     # Remove the highlighted flag
-                    maze[hy][hx] = remove_high(maze[hy][hx])
+                    if save_gen:
+                        overlay[hy][hx] = remove_high(overlay[hy][hx])
 
                     # Ending condition if all the loops terminates
                     if hy == (height-1) and hx == (width-1):
@@ -956,26 +1424,19 @@ def gen_hunt_and_kill(height, width, save_gen=False):
             # Save after wall removal
             # ----------------
             if save_gen:
-                draw_maze(maze)
-                # Get current time with milliseconds
-                current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-                # Construct filename with current time
-                filename = f"{current_time}.png"
-                save_plt(output_dir, filename)
-
+                draw_maze(maze, overlay)
+                save_plt_frame(archive)
 
-    # Remove the current flag (if any)
-    maze[y][x] = remove_current(maze[y][x])
 
     # Save last img: clean maze
     # ----------------
     if save_gen:
-        draw_maze(maze)
-        # Get current time with milliseconds
-        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-        # Construct filename with current time
-        filename = f"{current_time}.png"
-        save_plt(output_dir, filename)
+        # Remove the current flag (if any)
+        overlay[y][x] = remove_current(overlay[y][x])
+        draw_maze(maze, overlay)
+        save_plt_frame(archive)
+        # Write the archive index
+        archive.close()
 
 
     return maze
@@ -985,34 +1446,44 @@ def gen_hunt_and_kill(height, width, save_gen=False):
 
 
 
-def gen_random_dfs(height, width, save_gen=False):
+def gen_random_dfs(height, width, save_gen=False, maze=None):
     """
     Generates a maze using the Randomized Depth-First-Search algorithm.
     Also known as the "recursive backtracker" algorithm.
     Iterative implementation (with stack)
+    See gen_random_dfs_low_memory for a version without stack.
 
     Args:
     height (int): Height of the maze grid.
     width (int): Width of the maze grid.
     save_gen (bool): Save images of the generation
+    maze (list of list or ndarray, optional): Grid with all walls to carve,
+        e.g. a memory-mapped maze from init_maze_file. Default is a new init_maze.
 
     Returns:
     list: 2D list representing the generated maze.
     """
 
-    # Create the output_dir if save_gen
+    # Create the frame archive and the overlay if save_gen
     if save_gen:
-        output_dir = create_output_dir("gen_maze_")
+        archive = create_output_archive("gen_maze_")
+        overlay = init_overlay(height, width)
 
-    # Init maze with all walls and dark cells
-    maze    = init_maze(height, width)
+    # Init maze with all walls (if not given) and the visited grid
+    if maze is None:
+        maze    = init_maze(height, width)
+    visited = init_visited_like(maze)
 
     # Start from a random cell
     x = random.randint(0, width - 1)
     y = random.randint(0, height - 1)
 
+    # Mark the cell as visited
+    visited[y][x] = 1
+
     # Mark the cell as to backtrack
-    maze[y][x] = set_back(maze[y][x])
+    if save_gen:
+        overlay[y][x] = set_back(overlay[y][x])
 
     # Push it to the backtrack stack
     backtrack_stack = [(x, y)]
@@ -1020,35 +1491,31 @@ def gen_random_dfs(height, width, save_gen=False):
     # While the stack is not empty
     while backtrack_stack:
 
-        # Remove the current flag (if any)
-        maze[y][x] = remove_current(maze[y][x])
-
         # Pop a cell from the stack 
         px, py = backtrack_stack.pop()
 
-        # Here, if we are in a different cell (from prev one)
-        # we had moved in backtracking algorithm
-        if (px, py) != (x, y):
-            # Remove the backtrack flag (already backtracked)
-            maze[y][x] = remove_back(maze[y][x])
-            # Remove the dark flag
-            maze[y][x] = remove_dark(maze[y][x])
+        if save_gen:
+            # Remove the current flag (if any)
+            overlay[y][x] = remove_current(overlay[y][x])
+
+            # Here, if we are in a different cell (from prev one)
+            # we had moved in backtracking algorithm
+            if (px, py) != (x, y):
+                # Remove the backtrack flag (already backtracked)
+                overlay[y][x] = remove_back(overlay[y][x])
+                # Remove the dark flag
+                overlay[y][x] = remove_dark(overlay[y][x])
 
         # Update coord
         x, y = px, py
 
-        # Mark the cell as current
-        maze[y][x] = set_current(maze[y][x])
-
         # Save before wall removal
         # ----------------
         if save_gen:
-            draw_maze(maze)
-            # Get current time with milliseconds
-            current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-            # Construct filename with current time
-            filename = f"{current_time}.png"
-            save_plt(output_dir, filename)
+            # Mark the cell as current
+            overlay[y][x] = set_current(overlay[y][x])
+            draw_maze(maze, overlay)
+            save_plt_frame(archive)
 
         # Init a list of shuffle directions
         iDIR_list = list(range(len(directions)))
@@ -1067,8 +1534,7 @@ def gen_random_dfs(height, width, save_gen=False):
             if is_valid(maze, nx, ny):
 
                 # Check if the cell is an unvisited neighbour
-                # aka if is dark but not to be backtracked
-                if is_dark(maze[ny][nx]) and not is_back(maze[ny][nx]):
+                if not visited[ny][nx]:
                     
                     # Remove the wall between the current cell and the chosen cell
                     maze[y][x]   = remove_wall(maze[y][x], iDIR)
@@ -1078,14 +1544,17 @@ def gen_random_dfs(height, width, save_gen=False):
                     backtrack_stack.append((x,y))
 
                     # Remove the current flag
-                    maze[y][x] = remove_current(maze[y][x])
+                    if save_gen:
+                        overlay[y][x] = remove_current(overlay[y][x])
 
                     # Mark the chosen cell as the new current
                     x, y, = nx, ny
-                    maze[y][x] = set_current(maze[y][x])
+                    visited[y][x] = 1
 
-                    # Mark the cell as to backtrack
-                    maze[y][x] = set_back(maze[y][x])
+                    # Mark the cell as current and to backtrack
+                    if save_gen:
+                        overlay[y][x] = set_current(overlay[y][x])
+                        overlay[y][x] = set_back(overlay[y][x])
 
                     # Push the current cell to the stack
                     backtrack_stack.append((x,y))
@@ -1095,22 +1564,1164 @@ def gen_random_dfs(height, width, save_gen=False):
                     break
 
 
-    # Remove last cell as current
-    maze[y][x] = remove_current(maze[y][x])
-    # Remove the dark flag
-    maze[y][x] = remove_dark(maze[y][x])
-    # Remove the backtracked flag
-    maze[y][x] = remove_back(maze[y][x])
+    # Save last img: clean maze
+    # ----------------
+    if save_gen:
+        # Remove last cell as current, dark and backtracked
+        overlay[y][x] = remove_current(overlay[y][x])
+        overlay[y][x] = remove_dark(overlay[y][x])
+        overlay[y][x] = remove_back(overlay[y][x])
+        draw_maze(maze, overlay)
+        save_plt_frame(archive)
+        # Write the archive index
+        archive.close()
+
+
+    return maze
+
+
+
+
+
+
+def gen_random_dfs_low_memory(height, width, save_gen=False, maze=None):
+    """
+    Generates a maze using the Randomized Depth-First-Search algorithm,
+    without a backtrack stack.
+    Each carved cell stores in its spare bits (see iPARENT) the direction
+    to the cell it was reached from: backtracking follows these directions
+    and clears them.
+    A cell is unvisited while it has all its walls.
+    So the only memory is the maze itself (plus the overlay if save_gen).
+    Same maze and same images of gen_random_dfs, for the same random state.
+
+    Args:
+    height (int): Height of the maze grid.
+    width (int): Width of the maze grid.
+    save_gen (bool): Save images of the generation
+    maze (list of list or ndarray, optional): Grid with all walls to carve,
+        e.g. a memory-mapped maze from init_maze_file. Default is a new init_maze.
+
+    Returns:
+    list: 2D list representing the generated maze.
+    """
+
+    # Create the frame archive and the overlay if save_gen
+    if save_gen:
+        archive = create_output_archive("gen_maze_")
+        overlay = init_overlay(height, width)
+
+    # Init maze with all walls (if not given)
+    if maze is None:
+        maze    = init_maze(height, width)
+    all_walls   = (1 << iN) | (1 << iW) | (1 << iS) | (1 << iE)
+
+    # Start from a random cell
+    x = random.randint(0, width - 1)
+    y = random.randint(0, height - 1)
+    start_x, start_y = x, y
+
+    # Mark the cell as to backtrack
+    if save_gen:
+        overlay[y][x] = set_back(overlay[y][x])
+
+    while True:
+
+        # Save before wall removal
+        # ----------------
+        if save_gen:
+            # Mark the cell as current
+            overlay[y][x] = set_current(overlay[y][x])
+            draw_maze(maze, overlay)
+            save_plt_frame(archive)
+
+        # Init a list of shuffle directions
+        iDIR_list = list(range(len(directions)))
+        random.shuffle(iDIR_list)
+
+        # Flag if a cell is carved from the current one
+        carved = False
+
+        # while a direction is not yet checked 
+        while iDIR_list:
+
+            # Chose a direction
+            iDIR = iDIR_list.pop()
+
+            # Get the coord of the candidate cell in that direction 
+            nx, ny = move_from(x, y, iDIR, steps=1)
+
+            # Check if it is a valid and unvisited cell (all walls)
+            if is_valid(maze, nx, ny) and (maze[ny][nx] & all_walls) == all_walls:
+
+                # Remove the wall between the current cell and the chosen cell
+                maze[y][x]   = remove_wall(maze[y][x], iDIR)
+                maze[ny][nx] = remove_wall(maze[ny][nx], ((iDIR+2)%len(directions)))
+
+                # Store in the chosen cell the way back to the current cell
+                maze[ny][nx] = set_parent(maze[ny][nx], ((iDIR+2)%len(directions)))
+
+                # Remove the current flag
+                if save_gen:
+                    overlay[y][x] = remove_current(overlay[y][x])
+
+                # The chosen cell is the new current, to backtrack
+                x, y = nx, ny
+                if save_gen:
+                    overlay[y][x] = set_back(overlay[y][x])
+
+                carved = True
+                break
+
+        # goto new loop from the carved cell
+        if carved:
+            continue
+
+        # Dead end: back at the start cell, the maze is complete
+        if (x, y) == (start_x, start_y):
+            break
+
+        # Backtrack: follow (and clear) the direction to the parent cell
+        iDIR = get_parent(maze[y][x])
+        maze[y][x] = remove_parent(maze[y][x])
+
+        # Remove the current, backtrack and dark flags (already backtracked)
+        if save_gen:
+            overlay[y][x] = remove_current(overlay[y][x])
+            overlay[y][x] = remove_back(overlay[y][x])
+            overlay[y][x] = remove_dark(overlay[y][x])
+
+        x, y = move_from(x, y, iDIR, steps=1)
+
+
+    # Save last img: clean maze
+    # ----------------
+    if save_gen:
+        # Remove last cell as current, dark and backtracked
+        overlay[y][x] = remove_current(overlay[y][x])
+        overlay[y][x] = remove_dark(overlay[y][x])
+        overlay[y][x] = remove_back(overlay[y][x])
+        draw_maze(maze, overlay)
+        save_plt_frame(archive)
+        # Write the archive index
+        archive.close()
+
+
+    return maze
+
+
+
+
+
+
+def init_open_maze(height, width, maze=None):
+    """
+    Initialize a maze array with no walls except the border.
+
+    Parameters:
+    height (int): The number of rows in the maze.
+    width (int): The number of columns in the maze.
+    maze (ndarray, optional): A (height, width) array to fill (e.g. from init_maze_file).
+                              Default is a new array.
+
+    Returns:
+    ndarray: A (height, width) uint8 array of wall bits.
+    """
+    if maze is None:
+        maze = np.zeros((height, width), dtype=np.uint8)
+    else:
+        maze[:] = 0
+
+    # Border walls
+    maze[0, :]  |= (1 << iN)
+    maze[:, 0]  |= (1 << iW)
+    maze[-1, :] |= (1 << iS)
+    maze[:, -1] |= (1 << iE)
+    return maze
+
+
+
+def gen_recursive_division(height, width, save_gen=False, maze=None):
+    """
+    Generates a maze using the Recursive Division algorithm (a wall adder).
+    Start from a grid with no walls.
+    Divide the chamber with a horizontal or vertical wall,
+    leave one passage in it, then divide the two sub-chambers,
+    until the chambers are one cell wide or high.
+
+    The chambers are divided in rounds: every chamber of a round is
+    split at once, its walls and passages written with index arrays,
+    and its two sub-chambers make the next round (no per-chamber loop).
+
+    The chambers being divided are shown as to backtrack.
+
+    Args:
+    height (int): Height of the maze grid.
+    width (int): Width of the maze grid.
+    save_gen (bool): Save images of the generation
+    maze (ndarray, optional): A (height, width) uint8 array to fill,
+        e.g. a memory-mapped maze from init_maze_file. Default is a new array.
+
+    Returns:
+    ndarray: A (height, width) uint8 array representing the generated maze.
+    """
+
+    # Create the frame archive and the overlay if save_gen
+    if save_gen:
+        archive = create_output_archive("gen_maze_")
+        overlay = init_overlay(height, width)
+        for row in overlay:
+            row[:] = bytes(width)
+
+    # Init maze with no walls
+    maze    = init_open_maze(height, width, maze)
+
+    # Seeded from the random module, like the other generators
+    rng     = np.random.default_rng(random.getrandbits(64))
+
+    # Masks to clear the walls of the passages
+    keep_N  = np.uint8(0xFF ^ (1 << iN))
+    keep_W  = np.uint8(0xFF ^ (1 << iW))
+    keep_S  = np.uint8(0xFF ^ (1 << iS))
+    keep_E  = np.uint8(0xFF ^ (1 << iE))
+
+    def spans(start, length):
+        # Concatenated ranges [start, start+length) of the chambers
+        first = np.repeat(start - np.cumsum(length) + length, length)
+        return first + np.arange(length.sum())
+
+    # Chambers of the round: x, y, width, height
+    cx, cy, cw, ch = (np.array([v], dtype=np.int64) for v in (0, 0, width, height))
+
+    while cx.size:
+
+        # Too thin to be divided
+        big = (cw >= 2) & (ch >= 2)
+        cx, cy, cw, ch = cx[big], cy[big], cw[big], ch[big]
+        if cx.size == 0:
+            break
+
+        # Save before the division
+        # ----------------
+        if save_gen:
+            # Mark the chamber cells
+            for x, y, w, h in zip(cx, cy, cw, ch):
+                for row in overlay[y:y+h]:
+                    row[x:x+w] = bytes([1 << iBACK]) * w
+            draw_maze(maze, overlay)
+            save_plt_frame(archive)
+
+        # Divide across the longest side (flip a coin if square)
+        horizontal = (ch > cw) | ((ch == cw) & (rng.random(cx.size) < 0.5))
+
+        # Wall between the rows wy-1 and wy, passage at column px
+        hx, hy, hw, hh = cx[horizontal], cy[horizontal], cw[horizontal], ch[horizontal]
+        wy   = hy + 1 + (rng.random(hx.size) * (hh - 1)).astype(np.int64)
+        px   = hx + (rng.random(hx.size) * hw).astype(np.int64)
+        cols = spans(hx, hw)
+        rows = np.repeat(wy, hw)
+        maze[rows - 1, cols] |= np.uint8(1 << iS)
+        maze[rows, cols]     |= np.uint8(1 << iN)
+        maze[wy - 1, px] &= keep_S
+        maze[wy, px]     &= keep_N
+
+        # Wall between the columns wx-1 and wx, passage at row py
+        vx, vy, vw, vh = cx[~horizontal], cy[~horizontal], cw[~horizontal], ch[~horizontal]
+        wx   = vx + 1 + (rng.random(vx.size) * (vw - 1)).astype(np.int64)
+        py   = vy + (rng.random(vx.size) * vh).astype(np.int64)
+        rows = spans(vy, vh)
+        cols = np.repeat(wx, vh)
+        maze[rows, cols - 1] |= np.uint8(1 << iE)
+        maze[rows, cols]     |= np.uint8(1 << iW)
+        maze[py, wx - 1] &= keep_E
+        maze[py, wx]     &= keep_W
+
+        # Save after the division
+        # ----------------
+        if save_gen:
+            # Unmark the chamber cells
+            for x, y, w, h in zip(cx, cy, cw, ch):
+                for row in overlay[y:y+h]:
+                    row[x:x+w] = bytes(w)
+            draw_maze(maze, overlay)
+            save_plt_frame(archive)
+
+        # Sub-chambers of the next round: top, bottom, left, right
+        cx = np.concatenate((hx, hx, vx, wx))
+        cy = np.concatenate((hy, wy, vy, vy))
+        cw = np.concatenate((hw, hw, wx - vx, vx + vw - wx))
+        ch = np.concatenate((wy - hy, hy + hh - wy, vh, vh))
+
+
+    # Save last img: clean maze
+    # ----------------
+    if save_gen:
+        draw_maze(maze, overlay)
+        save_plt_frame(archive)
+        # Write the archive index
+        archive.close()
+
+
+    return maze
+
+
+
+# Cellular automaton rules (Life-like, B/S): neighbor counts of birth and survival
+ca_rules = {
+    'maze'      : ((3,), (1, 2, 3, 4, 5)),     # B3/S12345
+    'mazectric' : ((3,), (1, 2, 3, 4)),        # B3/S1234
+}
+
+
+
+def ca_step(pixels, born, survive):
+    """
+    Runs one step of a Life-like cellular automaton on the whole grid.
+    The 8 neighbors of each pixel are counted with shifted slices of
+    the padded grid, the new state is looked up from (alive, count).
+    Pixels outside the grid are dead.
+
+    Parameters:
+    pixels (ndarray): A (H, W) bool array, True for alive.
+    born (tuple): Neighbor counts making a dead pixel alive.
+    survive (tuple): Neighbor counts keeping an alive pixel alive.
+
+    Returns:
+    ndarray: The (H, W) bool array after the step.
+    """
+    H, W    = pixels.shape
+    padded  = np.pad(pixels, 1).view(np.uint8)
+    count   = np.zeros((H, W), dtype=np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            if dy != 1 or dx != 1:
+                count += padded[dy:dy+H, dx:dx+W]
+
+    # Next state by (alive, count)
+    table   = np.zeros((2, 9), dtype=bool)
+    table[0, list(born)]    = True
+    table[1, list(survive)] = True
+    return table[pixels.view(np.uint8), count]
+
+
+
+def pixels_to_maze(pixels, maze=None):
+    """
+    Converts a pixel maze of (2*height+1) x (2*width+1) pixels
+    (same layout of maze_raster: cells at odd rows and columns,
+    walls between them) into wall bits. An alive pixel is a wall.
+    The border walls are always set.
+
+    Parameters:
+    pixels (ndarray): A (2*height+1, 2*width+1) bool array.
+    maze (ndarray, optional): A (height, width) array to fill. Default is a new array.
+
+    Returns:
+    ndarray: A (height, width) uint8 array of wall bits.
+    """
+    height  = (pixels.shape[0] - 1) // 2
+    width   = (pixels.shape[1] - 1) // 2
+    if maze is None:
+        maze = np.empty((height, width), dtype=np.uint8)
+
+    walls   = pixels.astype(np.uint8)
+    maze[:]  = walls[0:-1:2, 1::2] << iN
+    maze    |= walls[1::2, 0:-1:2] << iW
+    maze    |= walls[2::2, 1::2] << iS
+    maze    |= walls[1::2, 2::2] << iE
+
+    # Border walls
+    maze[0, :]  |= (1 << iN)
+    maze[:, 0]  |= (1 << iW)
+    maze[-1, :] |= (1 << iS)
+    maze[:, -1] |= (1 << iE)
+    return maze
+
+
+
+def connect_regions(maze, rng):
+    """
+    Opens walls until every cell is reachable.
+    In each round every region opens one random wall
+    to a different region (all the rounds are whole-array operations),
+    so the number of regions at least halves.
+
+    Parameters:
+    maze (ndarray): A (height, width) uint8 array of wall bits, edited in place.
+    rng (numpy.random.Generator): The random generator.
+
+    Returns:
+    ndarray: The maze.
+    """
+    height, width = maze.shape
+    n_cells = height * width
+    flat    = maze.reshape(-1)
+    ids     = np.arange(n_cells).reshape(height, width)
+
+    # Inner walls, seen from the N or W cell: (cell, neighbor, S or E)
+    a       = np.concatenate([ids[:-1, :].ravel(), ids[:, :-1].ravel()])
+    b       = np.concatenate([ids[1:, :].ravel(),  ids[:, 1:].ravel()])
+    iDIRs   = np.concatenate([np.full((height-1) * width, iS), np.full(height * (width-1), iE)])
+    bits    = (1 << iDIRs).astype(np.uint8)
+
+    while True:
+        closed  = (flat[a] & bits) != 0
+        labels  = connected_components(n_cells, a[~closed], b[~closed])
+
+        # Closed walls between two regions
+        cross   = np.flatnonzero(closed & (labels[a] != labels[b]))
+        if cross.size == 0:
+            return maze
+
+        # One random wall per region (from either side)
+        cross   = rng.permutation(cross)
+        regions = np.concatenate([labels[a[cross]], labels[b[cross]]])
+        _, first = np.unique(regions, return_index=True)
+        opened  = np.unique(np.concatenate([cross, cross])[first])
+
+        # Open both sides (N/W side loses S/E, the other side loses N/W),
+        # unbuffered: a cell may open two walls in a round
+        np.bitwise_and.at(flat, a[opened], ~bits[opened])
+        np.bitwise_and.at(flat, b[opened], ~(bits[opened] >> 2))
+
+
+
+def gen_cellular_automaton(height, width, save_gen=False, maze=None, rule='maze', steps=100, density=0.5):
+    """
+    Generates a maze with a Life-like cellular automaton.
+    A random pixel grid of (2*height+1) x (2*width+1) pixels
+    (one per cell, wall and corner) evolves with the rule
+    until it is stable or after steps steps, each step on the whole grid.
+    Alive pixels between two cells are walls (see pixels_to_maze),
+    then the regions left closed are connected (see connect_regions).
+    The passages may have loops: the maze is not perfect.
+
+    Each step is saved as an image.
+
+    Args:
+    height (int): Height of the maze grid.
+    width (int): Width of the maze grid.
+    save_gen (bool): Save images of the generation
+    maze (ndarray, optional): A (height, width) uint8 array to fill,
+        e.g. a memory-mapped maze from init_maze_file. Default is a new array.
+    rule (str): The rule, a key of ca_rules. Default is 'maze' (B3/S12345).
+    steps (int): The maximum number of steps. Default is 100.
+    density (float): The fraction of alive pixels at the start. Default is 0.5.
+
+    Returns:
+    ndarray: A (height, width) uint8 array representing the generated maze.
+    """
+
+    # Create the frame archive if save_gen
+    if save_gen:
+        archive = create_output_archive("gen_maze_")
+
+    # Seeded from the random module, like the other generators
+    rng     = np.random.default_rng(random.getrandbits(64))
+    born, survive = ca_rules[rule]
+
+    # Random start
+    pixels  = rng.random((2*height + 1, 2*width + 1)) < density
+
+    for _ in range(steps):
+
+        # Save before the step
+        # ----------------
+        if save_gen:
+            draw_maze(pixels_to_maze(pixels))
+            save_plt_frame(archive)
+
+        # Step the whole grid, stop when stable
+        new_pixels = ca_step(pixels, born, survive)
+        if np.array_equal(new_pixels, pixels):
+            break
+        pixels = new_pixels
+
+    # Walls from the pixels, then join the closed regions
+    maze    = pixels_to_maze(pixels, maze)
+    connect_regions(maze, rng)
+
 
     # Save last img: clean maze
     # ----------------
     if save_gen:
         draw_maze(maze)
-        # Get current time with milliseconds
-        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-        # Construct filename with current time
-        filename = f"{current_time}.png"
-        save_plt(output_dir, filename)
+        save_plt_frame(archive)
+        # Write the archive index
+        archive.close()
+
 
+    return maze
 
-    return maze
\ No newline at end of file
+
+
+def gen_ca_maze(height, width, save_gen=False, maze=None):
+    """
+    Generates a maze with the "Maze" cellular automaton (B3/S12345).
+    See gen_cellular_automaton.
+    """
+    return gen_cellular_automaton(height, width, save_gen, maze, rule='maze')
+
+
+
+def gen_ca_mazectric(height, width, save_gen=False, maze=None):
+    """
+    Generates a maze with the "Mazectric" cellular automaton (B3/S1234),
+    longer and straighter corridors than "Maze".
+    See gen_cellular_automaton.
+    """
+    return gen_cellular_automaton(height, width, save_gen, maze, rule='mazectric')
+
+
+
+# Generation algorithms by name (used by the command line)
+generators = {
+    'binary_tree_se'        : gen_binary_tree_se,
+    'aldous_broder'         : gen_aldous_broder,
+    'hunt_and_kill'         : gen_hunt_and_kill,
+    'random_dfs'            : gen_random_dfs,
+    'random_dfs_low_memory' : gen_random_dfs_low_memory,
+    'recursive_division'    : gen_recursive_division,
+    'ca_maze'               : gen_ca_maze,
+    'ca_mazectric'          : gen_ca_mazectric,
+}
+
+
+
+
+
+
+
+
+
+
+# Maze Arrays
+# ----------------------------------------------------------------
+#   Whole-grid operations work on the maze as a numpy array
+#   of shape (height, width), same indexing maze[y][x].
+#   Cells are numbered in row-major order: id = y*width + x.
+
+def maze_to_array(maze):
+    """
+    Converts a maze to a numpy array of its wall bits.
+    An array maze is returned as it is (no copy).
+
+    Parameters:
+    maze (list of list or ndarray): The maze.
+
+    Returns:
+    ndarray: A (height, width) uint8 array with the wall bits of each cell.
+    """
+    if isinstance(maze, np.ndarray):
+        return maze
+    return np.array(maze, dtype=np.uint8) & 0x0F
+
+
+
+def open_mask(cells):
+    """
+    Computes for each cell and direction if there is a passage to the neighbor.
+    Passages through the border are never open.
+
+    Parameters:
+    cells (ndarray): A (height, width) array of wall bits,
+                     or a stacked batch (..., height, width).
+
+    Returns:
+    ndarray: A (..., height, width, 4) bool array, indexed by the direction indexes.
+    """
+    mask = np.empty(cells.shape + (len(directions),), dtype=bool)
+    for iDIR in range(len(directions)):
+        mask[..., iDIR] = (cells & (1 << iDIR)) == 0
+
+    # Close the border
+    mask[..., 0, :, iN]  = False
+    mask[..., :, 0, iW]  = False
+    mask[..., -1, :, iS] = False
+    mask[..., :, -1, iE] = False
+    return mask
+
+
+
+def maze_to_csr(maze):
+    """
+    Exports the maze as a graph in CSR (compressed sparse row) format.
+    The neighbors of cell i are indices[indptr[i]:indptr[i+1]],
+    in the order of the directions (N, W, S, E).
+    Both arrays support the buffer protocol (see csr_buffers).
+
+    Parameters:
+    maze (list of list or ndarray): The maze.
+
+    Returns:
+    tuple: (indptr, indices) numpy arrays.
+           indptr has height*width+1 elements (int64),
+           indices has one element per open passage side (int32, int64 for huge mazes).
+    """
+    cells = maze_to_array(maze)
+    height, width = cells.shape
+    n_cells = height * width
+
+    # Passages of each cell, in direction order
+    mask = open_mask(cells).reshape(n_cells, len(directions))
+
+    # Row pointers from the degrees
+    indptr = np.zeros(n_cells + 1, dtype=np.int64)
+    np.cumsum(mask.sum(axis=1), out=indptr[1:])
+
+    # Neighbor ids: cell id + offset of the direction
+    dtype   = np.int32 if n_cells < 2**31 else np.int64
+    flat    = np.flatnonzero(mask)
+    offsets = np.array([dy*width + dx for dx, dy in directions], dtype=dtype)
+    indices = (flat // len(directions)).astype(dtype)
+    indices += offsets[flat % len(directions)]
+
+    return indptr, indices
+
+
+
+def csr_buffers(indptr, indices):
+    """
+    Returns memoryviews on the CSR arrays, without copying them.
+    Useful to hand the graph to code using the buffer protocol.
+
+    Parameters:
+    indptr (ndarray): The row pointers (see maze_to_csr).
+    indices (ndarray): The neighbor ids (see maze_to_csr).
+
+    Returns:
+    tuple: (indptr, indices) memoryviews.
+    """
+    return memoryview(indptr), memoryview(indices)
+
+
+
+def csr_neighbors(indptr, indices, cell_id):
+    """
+    Returns the neighbors of a cell in a CSR graph (a view, no copy).
+
+    Parameters:
+    indptr (ndarray): The row pointers (see maze_to_csr).
+    indices (ndarray): The neighbor ids (see maze_to_csr).
+    cell_id (int): The id of the cell (y*width + x).
+
+    Returns:
+    ndarray: The ids of the reachable neighbors.
+    """
+    return indices[indptr[cell_id]:indptr[cell_id+1]]
+
+
+
+
+
+
+
+
+
+
+# Maze Post-processing
+# ----------------------------------------------------------------
+
+def braid(maze, ratio=1.0, rng=None):
+    """
+    Removes dead ends from a maze, adding loops ("braided" maze).
+    A fraction of the dead ends is chosen at random, then opened
+    in rounds, all the chosen dead ends of a round at once:
+    each one removes one of its walls, preferring a neighbor that
+    is a dead end too (both are fixed by one wall).
+    When a dead end would open into another chosen dead end that
+    opens elsewhere, the one with the larger id waits for the next round,
+    where it is dropped if it is not a dead end anymore.
+
+    Parameters:
+    maze (list of list or ndarray): The maze, output of any gen_* function.
+    ratio (float): The fraction of dead ends to remove, in [0, 1]. Default is 1.
+    rng (numpy.random.Generator or int, optional): The random generator (or its seed).
+
+    Returns:
+    list of list or ndarray: The braided maze (a copy, same type of maze).
+    """
+    rng     = np.random.default_rng(rng)
+    cells   = maze_to_array(maze).copy()
+    height, width = cells.shape
+    n_dirs  = len(directions)
+    offsets = np.array([dy*width + dx for dx, dy in directions])
+
+    # Choose the dead ends to remove
+    mask    = open_mask(cells)
+    dead    = np.flatnonzero(mask.sum(axis=-1).ravel() == 1)
+    chosen  = np.zeros(height * width, dtype=bool)
+    chosen[rng.choice(dead, int(round(ratio * dead.size)), replace=False)] = True
+
+    # Walls that can be removed (not on the border)
+    inside  = np.ones((height, width, n_dirs), dtype=bool)
+    inside[0, :, iN]  = False
+    inside[:, 0, iW]  = False
+    inside[-1, :, iS] = False
+    inside[:, -1, iE] = False
+    inside  = inside.reshape(-1, n_dirs)
+
+    while True:
+
+        # Chosen cells still dead ends
+        mask    = open_mask(cells).reshape(-1, n_dirs)
+        is_dead = mask.sum(axis=-1) == 1
+        chosen &= is_dead
+        src     = np.flatnonzero(chosen)
+        if src.size == 0:
+            break
+
+        # Candidate walls: random keys, +1 if the neighbor is a dead end
+        walls   = inside[src] & ~mask[src]
+        nbr     = src[:, None] + offsets[None, :]
+        nbr_ok  = np.where(walls, nbr, 0)
+        keys    = rng.random(walls.shape) + is_dead[nbr_ok]
+        keys[~walls] = -1
+        iDIR    = keys.argmax(axis=1)
+
+        # Dead ends with only border walls cannot be opened
+        no_wall = ~walls[np.arange(src.size), iDIR]
+        chosen[src[no_wall]] = False
+        src, iDIR = src[~no_wall], iDIR[~no_wall]
+        if src.size == 0:
+            continue
+        tgt     = src + offsets[iDIR]
+
+        # Conflicts: a dead end opening (not mutually) into another chosen dead end,
+        # the larger id of the two waits
+        target_of = np.full(height * width, -1)
+        target_of[src] = tgt
+        mutual  = target_of[tgt] == src
+        waits   = np.zeros(height * width, dtype=bool)
+        hit     = chosen[tgt] & ~mutual
+        waits[np.maximum(src[hit], tgt[hit])] = True
+        act     = ~waits[src]
+        src, tgt, iDIR = src[act], tgt[act], iDIR[act]
+
+        # Remove the walls on both sides (unbuffered: a cell can lose several walls)
+        flat    = cells.reshape(-1)
+        np.bitwise_and.at(flat, src, (0xFF ^ (1 << iDIR)).astype(np.uint8))
+        np.bitwise_and.at(flat, tgt, (0xFF ^ (1 << ((iDIR + 2) % n_dirs))).astype(np.uint8))
+        chosen[src] = False
+
+    if isinstance(maze, np.ndarray):
+        return cells
+    return cells.tolist()
+
+
+
+
+
+
+
+
+
+
+# Maze Vector Export
+# ----------------------------------------------------------------
+#   SVG and PDF files written directly (no matplotlib).
+#   Each wall is drawn once, and the collinear walls of a row
+#   (or of a column) are merged into one long segment.
+
+def runs(lines):
+    """
+    Finds the runs of consecutive True along the last axis.
+
+    Parameters:
+    lines (ndarray): A (n_lines, length) bool array.
+
+    Returns:
+    tuple: (line, start, end) int arrays, one element per run (end excluded).
+    """
+    n_lines, length = lines.shape
+    padded = np.zeros((n_lines, length + 2), dtype=np.int8)
+    padded[:, 1:-1] = lines
+    steps  = np.diff(padded, axis=1)
+    starts = np.argwhere(steps == 1)
+    ends   = np.argwhere(steps == -1)
+    return starts[:, 0], starts[:, 1], ends[:, 1]
+
+
+
+def wall_segments(maze):
+    """
+    Computes the wall segments of the maze, each wall once,
+    collinear walls merged.
+
+    Parameters:
+    maze (list of list or ndarray): The maze.
+
+    Returns:
+    tuple: (horizontal, vertical) int arrays of segments (x0, y0, x1, y1)
+           in cell units, (0, 0) is the top-left corner of the maze.
+    """
+    cells = maze_to_array(maze)
+    height, width = cells.shape
+
+    # A wall is set if any side of it is set
+    horiz = np.zeros((height+1, width), dtype=bool)
+    horiz[:-1] |= (cells & (1 << iN)) != 0
+    horiz[1:]  |= (cells & (1 << iS)) != 0
+    vert  = np.zeros((width+1, height), dtype=bool)
+    vert[:-1]  |= ((cells & (1 << iW)) != 0).T
+    vert[1:]   |= ((cells & (1 << iE)) != 0).T
+
+    # Rows of horizontal walls, columns of vertical walls
+    y, x0, x1 = runs(horiz)
+    x, y0, y1 = runs(vert)
+    horizontal = np.stack([x0, y, x1, y], axis=1)
+    vertical   = np.stack([x, y0, x, y1], axis=1)
+    return horizontal, vertical
+
+
+
+def save_svg(maze, path, cell_size=10, wall_thick=wall_thick, color=wall_col):
+    """
+    Saves the walls of the maze into a SVG file (one path).
+
+    Parameters:
+    maze (list of list or ndarray): The maze.
+    path (str): The output .svg file.
+    cell_size (float): The size of a cell. Default is 10.
+    wall_thick (float): The width of the walls.
+    color (str): The color of the walls.
+    """
+    cells = maze_to_array(maze)
+    height, width = cells.shape
+    margin = wall_thick
+
+    # One subpath per segment: move, then horizontal or vertical line
+    horizontal, vertical = wall_segments(cells)
+    d = []
+    for x0, y0, x1, y1 in horizontal:
+        d.append(f"M{x0*cell_size + margin:g} {y0*cell_size + margin:g}H{x1*cell_size + margin:g}")
+    for x0, y0, x1, y1 in vertical:
+        d.append(f"M{x0*cell_size + margin:g} {y0*cell_size + margin:g}V{y1*cell_size + margin:g}")
+
+    svg_width  = width*cell_size + 2*margin
+    svg_height = height*cell_size + 2*margin
+    with open(path, 'w') as fp:
+        fp.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{svg_width:g}" height="{svg_height:g}" '
+                 f'viewBox="0 0 {svg_width:g} {svg_height:g}">\n')
+        fp.write(f'<path fill="none" stroke="{color}" stroke-width="{wall_thick:g}" '
+                 f'stroke-linecap="square" d="{"".join(d)}"/>\n')
+        fp.write('</svg>\n')
+
+
+
+def save_pdf(maze, path, cell_size=10, wall_thick=wall_thick, color=wall_col):
+    """
+    Saves the walls of the maze into a one page PDF file (compressed content).
+
+    Parameters:
+    maze (list of list or ndarray): The maze.
+    path (str): The output .pdf file.
+    cell_size (float): The size of a cell, in points. Default is 10.
+    wall_thick (float): The width of the walls, in points.
+    color (str): The color of the walls ('#rrggbb').
+    """
+    import zlib
+
+    cells = maze_to_array(maze)
+    height, width = cells.shape
+    margin = wall_thick
+    page_width  = width*cell_size + 2*margin
+    page_height = height*cell_size + 2*margin
+    r, g, b = (int(color[i:i+2], 16) / 255 for i in (1, 3, 5))
+
+    # Content: flip the y axis, then one move/line per segment
+    horizontal, vertical = wall_segments(cells)
+    ops = [f"1 0 0 -1 {margin:g} {page_height - margin:g} cm",
+           f"{wall_thick:g} w 2 J {r:.3g} {g:.3g} {b:.3g} RG"]
+    for x0, y0, x1, y1 in np.concatenate([horizontal, vertical]):
+        ops.append(f"{x0*cell_size:g} {y0*cell_size:g} m {x1*cell_size:g} {y1*cell_size:g} l")
+    ops.append("S")
+    content = zlib.compress("\n".join(ops).encode())
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:g} {page_height:g}] "
+        f"/Resources << >> /Contents 4 0 R >>".encode(),
+        f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode() + content + b"\nendstream",
+    ]
+
+    # Objects, cross-reference table and trailer
+    with open(path, 'wb') as fp:
+        fp.write(b"%PDF-1.4\n")
+        offsets = []
+        for num, obj in enumerate(objects, 1):
+            offsets.append(fp.tell())
+            fp.write(f"{num} 0 obj\n".encode() + obj + b"\nendobj\n")
+        xref = fp.tell()
+        fp.write(f"xref\n0 {len(objects)+1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            fp.write(f"{offset:010d} 00000 n \n".encode())
+        fp.write(f"trailer\n<< /Size {len(objects)+1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+
+
+
+
+
+
+
+
+# Maze Verification
+# ----------------------------------------------------------------
+#   A valid (perfect) maze has:
+#   - symmetric walls: the wall between two cells is set on both sides
+#   - the border walls
+#   - no bits above the wall bits (overlay, spare bits)
+#   - passages forming a spanning tree: connected, no cycles
+
+def connected_components(n_nodes, u, v):
+    """
+    Labels the connected components of a graph with a flat union-find:
+    all the edges are hooked at once (root of the larger label under
+    the smaller one), then the parent array is compressed by pointer jumping,
+    until no edge joins two different roots.
+
+    Parameters:
+    n_nodes (int): The number of nodes.
+    u (ndarray): The first node of each edge.
+    v (ndarray): The second node of each edge.
+
+    Returns:
+    ndarray: The label of each node (the smallest node id of its component).
+    """
+    parent = np.arange(n_nodes)
+    while True:
+        pu, pv  = parent[u], parent[v]
+        lo      = np.minimum(pu, pv)
+        hi      = np.maximum(pu, pv)
+        join    = lo != hi
+        if not join.any():
+            return parent
+
+        # Hook the roots, then compress the paths
+        np.minimum.at(parent, hi[join], lo[join])
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+
+
+def maze_checks(mazes):
+    """
+    Runs the verification checks on one maze or on a stacked batch,
+    with whole-array comparisons and one union-find over all the mazes.
+
+    Parameters:
+    mazes (list of list or ndarray): One maze, or a (n, height, width) array.
+
+    Returns:
+    dict: 'symmetric', 'border', 'clean', 'tree' and 'valid',
+          bool arrays with the batch shape (scalars for one maze).
+    """
+    cells   = np.asarray(mazes, dtype=np.int64)
+    lead    = cells.shape[:-2]
+    height, width = cells.shape[-2:]
+    cells   = cells.reshape((-1, height, width))
+    n_mazes = cells.shape[0]
+    n_cells = height * width
+
+    def wall(iDIR):
+        return (cells & (1 << iDIR)) != 0
+
+    # Walls between neighbors agree on both sides
+    symmetric = ((wall(iS)[:, :-1, :] == wall(iN)[:, 1:, :]).all(axis=(1, 2))
+               & (wall(iE)[:, :, :-1] == wall(iW)[:, :, 1:]).all(axis=(1, 2)))
+
+    # Border walls intact
+    border  = (wall(iN)[:, 0, :].all(axis=1) & wall(iS)[:, -1, :].all(axis=1)
+             & wall(iW)[:, :, 0].all(axis=1) & wall(iE)[:, :, -1].all(axis=1))
+
+    # Only wall bits
+    clean   = (cells & ~0x0F == 0).all(axis=(1, 2))
+
+    # Passages (seen from the S and E sides), node ids offset per maze
+    ids     = np.arange(n_mazes * n_cells).reshape(n_mazes, height, width)
+    open_S  = ~wall(iS)[:, :-1, :]
+    open_E  = ~wall(iE)[:, :, :-1]
+    u       = np.concatenate([ids[:, :-1, :][open_S], ids[:, :, :-1][open_E]])
+    v       = np.concatenate([ids[:, 1:, :][open_S],  ids[:, :, 1:][open_E]])
+    edges   = open_S.sum(axis=(1, 2)) + open_E.sum(axis=(1, 2))
+
+    # Spanning tree: n-1 passages and one component
+    labels  = connected_components(n_mazes * n_cells, u, v)
+    roots   = (labels == np.arange(n_mazes * n_cells)).reshape(n_mazes, n_cells).sum(axis=1)
+    tree    = (edges == n_cells - 1) & (roots == 1)
+
+    checks = {
+        'symmetric' : symmetric,
+        'border'    : border,
+        'clean'     : clean,
+        'tree'      : tree,
+        'valid'     : symmetric & border & clean & tree,
+    }
+    return {name: check.reshape(lead) if lead else bool(check[0]) for name, check in checks.items()}
+
+
+
+def verify_maze(maze):
+    """
+    Checks that a maze is a valid perfect maze (see maze_checks).
+
+    Parameters:
+    maze (list of list or ndarray): The maze, output of a gen_* function.
+
+    Returns:
+    list: The problems found, empty if the maze is valid.
+    """
+    # Not even a grid
+    if maze is None or len(maze) == 0 or len(maze[0]) == 0:
+        return [f"not a maze: {maze!r}"]
+
+    checks   = maze_checks(maze)
+    messages = {
+        'symmetric' : "walls between neighbors are not set on both sides",
+        'border'    : "border walls are missing",
+        'clean'     : "cells have bits other than the walls (overlay or spare bits left)",
+        'tree'      : "passages are not a spanning tree (disconnected cells or loops)",
+    }
+    return [message for name, message in messages.items() if not checks[name]]
+
+
+
+
+
+
+
+
+
+
+# Command Line
+# ----------------------------------------------------------------
+#   python -m mazelib generate  ALGO HEIGHT WIDTH [-o maze.npy]
+#   python -m mazelib render    maze.npy [-o maze.png]
+#   python -m mazelib export    maze.npy [-o maze.npz|maze.svg|maze.pdf]
+#   python -m mazelib benchmark HEIGHT WIDTH [--algorithms ...]
+#
+#   Mazes are stored as .npy arrays of wall bits.
+
+def cmd_generate(args):
+    """
+    Generates a maze and saves it (or prints it as ASCII).
+    """
+    # From the cache (if given) or generated
+    if args.cache:
+        if args.seed is None:
+            sys.exit("--cache needs --seed")
+        from mazecache import MazeCache
+        maze = MazeCache(args.cache).generate(args.algorithm, args.height, args.width, args.seed)
+    else:
+        if args.seed is not None:
+            random.seed(args.seed)
+        maze = generators[args.algorithm](args.height, args.width, args.save_gen)
+
+    if args.output:
+        np.save(args.output, maze_to_array(maze))
+    else:
+        print_maze_as_ascii(maze.tolist() if isinstance(maze, np.ndarray) else maze)
+
+
+
+def cmd_render(args):
+    """
+    Renders a saved maze into a png file.
+    """
+    maze = np.load(args.maze, mmap_mode='r')
+    output = args.output or os.path.splitext(args.maze)[0] + '.png'
+    draw_maze(maze, pixels=args.pixels)
+    save_plt(os.path.dirname(output) or '.', os.path.basename(output))
+
+
+
+def cmd_export(args):
+    """
+    Exports a saved maze, by the output extension:
+    .npz CSR graph (indptr and indices), .svg or .pdf walls,
+    .dzi tile pyramid (see mazetiles).
+    """
+    maze = np.load(args.maze, mmap_mode='r')
+    output = args.output or os.path.splitext(args.maze)[0] + '.npz'
+    ext = os.path.splitext(output)[1].lower()
+    if ext == '.svg':
+        save_svg(maze, output)
+    elif ext == '.pdf':
+        save_pdf(maze, output)
+    elif ext == '.dzi':
+        from mazetiles import save_tiles
+        save_tiles(maze, output)
+    else:
+        indptr, indices = maze_to_csr(maze)
+        np.savez(output, indptr=indptr, indices=indices)
+
+
+
+def cmd_benchmark(args):
+    """
+    Times the generation algorithms.
+    """
+    if args.seed is not None:
+        random.seed(args.seed)
+    for name in args.algorithms or generators:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            generators[name](args.height, args.width)
+            times.append(time.perf_counter() - start)
+        print(f"{name:24} best {min(times)*1000:10.2f} ms   mean {sum(times)/len(times)*1000:10.2f} ms")
+
+
+
+def main(argv=None):
+    """
+    Command line entry point: python -m mazelib <command> ...
+
+    Parameters:
+    argv (list, optional): The arguments. Default is sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(prog="python -m mazelib", description="Generate, render and export mazes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("generate", help="generate a maze")
+    cmd.add_argument("algorithm", choices=sorted(generators))
+    cmd.add_argument("height", type=int)
+    cmd.add_argument("width", type=int)
+    cmd.add_argument("-o", "--output", help="output .npy file (default: print as ASCII)")
+    cmd.add_argument("--seed", type=int, default=None, help="random seed")
+    cmd.add_argument("--save-gen", action="store_true", help="save the images of the generation")
+    cmd.add_argument("--cache", help="cache directory of generated mazes (needs --seed)")
+    cmd.set_defaults(func=cmd_generate)
+
+    cmd = commands.add_parser("render", help="render a maze into a png file")
+    cmd.add_argument("maze", help="maze .npy file")
+    cmd.add_argument("-o", "--output", help="output png file (default: <maze>.png)")
+    cmd.add_argument("--pixels", type=int, default=512, help="size of the image (default: 512)")
+    cmd.set_defaults(func=cmd_render)
+
+    cmd = commands.add_parser("export", help="export a maze as a CSR graph (.npz), vector image (.svg, .pdf) or tile pyramid (.dzi)")
+    cmd.add_argument("maze", help="maze .npy file")
+    cmd.add_argument("-o", "--output", help="output .npz, .svg, .pdf or .dzi file (default: <maze>.npz)")
+    cmd.set_defaults(func=cmd_export)
+
+    cmd = commands.add_parser("benchmark", help="time the generation algorithms")
+    cmd.add_argument("height", type=int)
+    cmd.add_argument("width", type=int)
+    cmd.add_argument("--algorithms", nargs="+", choices=sorted(generators), help="algorithms to time (default: all)")
+    cmd.add_argument("--repeat", type=int, default=3, help="runs per algorithm (default: 3)")
+    cmd.add_argument("--seed", type=int, default=None, help="random seed")
+    cmd.set_defaults(func=cmd_benchmark)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+
+# Maze Path Queries
+# ----------------------------------------------------------------
+#   A perfect maze is a spanning tree of its cells:
+#   the path between two cells is unique and goes through
+#   their lowest common ancestor (LCA) in the tree.
+#   The index is built once per maze (BFS parent/depth arrays
+#   plus binary lifting), then answers batches of queries:
+#   path length in O(log n), full path in O(length).
+#   Cells are identified by their id: y*width + x.
+
+import numpy as np
+import mazelib as ml
+
+
+
+
+def bfs_tree(indptr, indices, root=0):
+    """
+    Breadth-first search from root on a CSR graph, one level at a time.
+
+    Parameters:
+    indptr (ndarray): The row pointers (see mazelib.maze_to_csr).
+    indices (ndarray): The neighbor ids (see mazelib.maze_to_csr).
+    root (int): The id of the root cell.
+
+    Returns:
+    tuple: (parent, depth) int arrays. The root is its own parent,
+           unreachable cells have depth -1 and are their own parent.
+    """
+    n_nodes = len(indptr) - 1
+    parent  = np.arange(n_nodes)
+    depth   = np.full(n_nodes, -1, dtype=np.int64)
+    depth[root] = 0
+
+    frontier = np.array([root])
+    level    = 0
+    while frontier.size:
+        # All the neighbors of the frontier (with the node they come from)
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        origin = np.repeat(frontier, counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        nbr    = indices[np.repeat(starts, counts) + offset]
+
+        # Keep the unvisited ones (in a tree each one is reached once)
+        new    = depth[nbr] < 0
+        nbr, origin = nbr[new], origin[new]
+        nbr, first  = np.unique(nbr, return_index=True)
+        origin = origin[first]
+
+        level += 1
+        depth[nbr]  = level
+        parent[nbr] = origin
+        frontier    = nbr
+
+    return parent, depth
+
+
+
+
+class PathIndex:
+    """
+    Path-query index of a perfect maze.
+    """
+
+    def __init__(self, maze, root=0):
+        """
+        Builds the index: BFS tree from root and binary lifting table.
+
+        Parameters:
+        maze (list of list or ndarray): A perfect maze (output of a gen_* function).
+        root (int): The id of the root cell. Default is the top-left cell.
+        """
+        cells = ml.maze_to_array(maze)
+        self.height, self.width = cells.shape
+
+        indptr, indices = ml.maze_to_csr(cells)
+        self.parent, self.depth = bfs_tree(indptr, indices, root)
+
+        # up[k][i] is the 2^k-th ancestor of i (the root is its own ancestor)
+        levels  = max(1, int(self.depth.max()).bit_length())
+        self.up = [self.parent]
+        for _ in range(1, levels):
+            prev = self.up[-1]
+            self.up.append(prev[prev])
+
+    def cell_id(self, x, y):
+        """
+        Returns the id of the cell (x, y) (arrays accepted).
+        """
+        return np.asarray(y) * self.width + np.asarray(x)
+
+    def cell_xy(self, cell_id):
+        """
+        Returns the coordinates (x, y) of the cell id (arrays accepted).
+        """
+        y, x = np.divmod(np.asarray(cell_id), self.width)
+        return x, y
+
+    def lca(self, u, v):
+        """
+        Returns the lowest common ancestors of pairs of cells.
+
+        Parameters:
+        u (int or ndarray): The ids of the first cells.
+        v (int or ndarray): The ids of the second cells.
+
+        Returns:
+        ndarray: The ids of the lowest common ancestors.
+        """
+        u = np.array(u, dtype=np.int64, ndmin=1)
+        v = np.array(v, dtype=np.int64, ndmin=1)
+
+        # Let u be the deeper cell of each pair
+        swap = self.depth[u] < self.depth[v]
+        u[swap], v[swap] = v[swap], u[swap]
+
+        # Lift u to the depth of v
+        diff = self.depth[u] - self.depth[v]
+        for k, up in enumerate(self.up):
+            lift = (diff >> k) & 1 == 1
+            u[lift] = up[u[lift]]
+
+        # Lift both, while their ancestors differ
+        for up in reversed(self.up):
+            differ = up[u] != up[v]
+            u[differ] = up[u[differ]]
+            v[differ] = up[v[differ]]
+
+        return np.where(u == v, u, self.parent[u])
+
+    def distance(self, start, goal):
+        """
+        Returns the path lengths (number of moves) between pairs of cells.
+
+        Parameters:
+        start (int or ndarray): The ids of the start cells.
+        goal (int or ndarray): The ids of the goal cells.
+
+        Returns:
+        ndarray: The path lengths, -1 where a cell is unreachable.
+        """
+        start = np.array(start, dtype=np.int64, ndmin=1)
+        goal  = np.array(goal, dtype=np.int64, ndmin=1)
+        dist  = self.depth[start] + self.depth[goal] - 2 * self.depth[self.lca(start, goal)]
+        unreachable = (self.depth[start] < 0) | (self.depth[goal] < 0)
+        return np.where(unreachable, -1, dist)
+
+    def path(self, start, goal):
+        """
+        Returns the path between two cells.
+
+        Parameters:
+        start (int): The id of the start cell.
+        goal (int): The id of the goal cell.
+
+        Returns:
+        ndarray: The ids of the cells from start to goal (both included),
+                 empty if a cell is unreachable.
+        """
+        if self.depth[start] < 0 or self.depth[goal] < 0:
+            return np.array([], dtype=np.int64)
+        top = int(self.lca(start, goal)[0])
+
+        # Climb from both ends to the common ancestor
+        up_path = [start]
+        while up_path[-1] != top:
+            up_path.append(int(self.parent[up_path[-1]]))
+        down_path = [goal]
+        while down_path[-1] != top:
+            down_path.append(int(self.parent[down_path[-1]]))
+
+        return np.array(up_path + down_path[-2::-1], dtype=np.int64)
+
+    def paths(self, starts, goals):
+        """
+        Returns the paths between pairs of cells.
+
+        Parameters:
+        starts (ndarray): The ids of the start cells.
+        goals (ndarray): The ids of the goal cells.
+
+        Returns:
+        tuple: (cells, offsets): the path i is cells[offsets[i]:offsets[i+1]].
+        """
+        paths   = [self.path(int(s), int(g)) for s, g in zip(starts, goals)]
+        offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in paths], out=offsets[1:])
+        cells   = np.concatenate(paths) if paths else np.array([], dtype=np.int64)
+        return cells, offsets
@@ -0,0 +1,312 @@
+#!/usr/bin/python3
+
+# Maze Bitplanes
+# ----------------------------------------------------------------
+#   In the cell layout (see mazelib) every inner wall is stored twice,
+#   once in each cell it separates.
+#   Here each wall is stored once, one bit per edge, in two planes:
+#
+#   horizontal  (height+1, width)  bit [y][x] : wall above the cell (x, y)
+#   vertical    (height, width+1)  bit [y][x] : wall left of the cell (x, y)
+#
+#   So the N wall of (x, y) is the S wall of (x, y-1): one bit,
+#   opening a passage is one write and the sides cannot disagree.
+#   Each row of a plane is packed 8 edges per byte (little bit order,
+#   as numpy.packbits(..., bitorder='little')), about 2 bits per cell.
+#
+#   WallPlanes is also indexed as maze[y][x] (the wall bits of the cell),
+#   so the gen_* functions carve it through their maze argument,
+#   and it converts to the cell array (numpy.asarray, mazelib.maze_to_array)
+#   for the renderers and the solvers.
+
+import numpy as np
+import mazelib as ml
+
+
+
+
+def cells_to_planes(cells):
+    """
+    Computes the wall planes of a maze in the cell layout.
+    A wall is set if any side of it is set.
+
+    Parameters:
+    cells (ndarray): A (height, width) array of wall bits (other bits are ignored).
+
+    Returns:
+    tuple: (horizontal, vertical) bool arrays, (height+1, width) and (height, width+1).
+    """
+    cells  = np.asarray(cells)
+    height, width = cells.shape
+
+    def wall(iDIR):
+        return (cells & (1 << iDIR)) != 0
+
+    horizontal = np.zeros((height+1, width), dtype=bool)
+    horizontal[:-1] |= wall(ml.iN)
+    horizontal[1:]  |= wall(ml.iS)
+    vertical   = np.zeros((height, width+1), dtype=bool)
+    vertical[:, :-1] |= wall(ml.iW)
+    vertical[:, 1:]  |= wall(ml.iE)
+    return horizontal, vertical
+
+
+
+def planes_to_cells(horizontal, vertical):
+    """
+    Computes the cell layout of a maze from its wall planes.
+
+    Parameters:
+    horizontal (ndarray): The (height+1, width) bool horizontal walls.
+    vertical (ndarray): The (height, width+1) bool vertical walls.
+
+    Returns:
+    ndarray: A (height, width) uint8 array of wall bits.
+    """
+    cells  = horizontal[:-1].astype(np.uint8) << ml.iN
+    cells |= vertical[:, :-1].astype(np.uint8) << ml.iW
+    cells |= horizontal[1:].astype(np.uint8) << ml.iS
+    cells |= vertical[:, 1:].astype(np.uint8) << ml.iE
+    return cells
+
+
+
+
+class WallPlanes:
+    """
+    A maze stored as two packed bit planes, each wall once.
+    """
+
+    def __init__(self, height, width):
+        """
+        Creates a maze with all walls.
+
+        Parameters:
+        height (int): The number of rows in the maze.
+        width (int): The number of columns in the maze.
+        """
+        self.height = height
+        self.width  = width
+
+        # Bytes per row of each plane
+        self.h_stride = (width + 7) // 8
+        self.v_stride = (width + 8) // 8
+
+        # Packed planes: bytearrays for single edges, numpy views for whole planes
+        self.h_bytes = bytearray(b'\xff' * ((height + 1) * self.h_stride))
+        self.v_bytes = bytearray(b'\xff' * (height * self.v_stride))
+        self.h_packed = np.frombuffer(self.h_bytes, dtype=np.uint8).reshape(height + 1, self.h_stride)
+        self.v_packed = np.frombuffer(self.v_bytes, dtype=np.uint8).reshape(height, self.v_stride)
+
+    @classmethod
+    def from_maze(cls, maze):
+        """
+        Converts a maze in the cell layout.
+
+        Parameters:
+        maze (list of list or ndarray): The maze.
+
+        Returns:
+        WallPlanes: The same maze as wall planes.
+        """
+        cells  = ml.maze_to_array(maze)
+        planes = cls(*cells.shape)
+        planes.set_planes(*cells_to_planes(cells))
+        return planes
+
+    def planes(self):
+        """
+        Unpacks the wall planes.
+
+        Returns:
+        tuple: (horizontal, vertical) bool arrays, (height+1, width) and (height, width+1).
+        """
+        horizontal = np.unpackbits(self.h_packed, axis=1, count=self.width, bitorder='little')
+        vertical   = np.unpackbits(self.v_packed, axis=1, count=self.width + 1, bitorder='little')
+        return horizontal.view(bool), vertical.view(bool)
+
+    def set_planes(self, horizontal, vertical):
+        """
+        Replaces all the walls.
+
+        Parameters:
+        horizontal (ndarray): The (height+1, width) bool horizontal walls.
+        vertical (ndarray): The (height, width+1) bool vertical walls.
+        """
+        self.h_packed[:] = np.packbits(horizontal, axis=1, bitorder='little')
+        self.v_packed[:] = np.packbits(vertical, axis=1, bitorder='little')
+
+    def to_cells(self):
+        """
+        Converts the maze to the cell layout.
+
+        Returns:
+        ndarray: A (height, width) uint8 array of wall bits.
+        """
+        return planes_to_cells(*self.planes())
+
+    def open_mask(self):
+        """
+        Computes for each cell and direction if there is a passage to the neighbor,
+        like mazelib.open_mask, without building the cell array.
+
+        Returns:
+        ndarray: A (height, width, 4) bool array, indexed by the direction indexes.
+        """
+        horizontal, vertical = self.planes()
+        mask = np.empty((self.height, self.width, len(ml.directions)), dtype=bool)
+        mask[..., ml.iN] = ~horizontal[:-1]
+        mask[..., ml.iW] = ~vertical[:, :-1]
+        mask[..., ml.iS] = ~horizontal[1:]
+        mask[..., ml.iE] = ~vertical[:, 1:]
+
+        # Close the border
+        mask[0, :, ml.iN]  = False
+        mask[:, 0, ml.iW]  = False
+        mask[-1, :, ml.iS] = False
+        mask[:, -1, ml.iE] = False
+        return mask
+
+    @property
+    def nbytes(self):
+        return len(self.h_bytes) + len(self.v_bytes)
+
+    # Single edges
+    # ----------------
+
+    def _edge(self, x, y, iDIR):
+        # (buffer, byte index, bit mask) of the wall of (x, y) in direction iDIR
+        if iDIR == ml.iN or iDIR == ml.iS:
+            y += iDIR == ml.iS
+            return self.h_bytes, y*self.h_stride + (x >> 3), 1 << (x & 7)
+        x += iDIR == ml.iE
+        return self.v_bytes, y*self.v_stride + (x >> 3), 1 << (x & 7)
+
+    def has_wall(self, x, y, iDIR):
+        """
+        Checks if the cell (x, y) has a wall in the given direction.
+
+        Parameters:
+        x (int): x-coordinate of the cell.
+        y (int): y-coordinate of the cell.
+        iDIR (int): The direction of the wall.
+
+        Returns:
+        bool: True if the wall is set.
+        """
+        buf, i, bit = self._edge(x, y, iDIR)
+        return buf[i] & bit != 0
+
+    def open_wall(self, x, y, iDIR):
+        """
+        Removes the wall between a cell and its neighbor in the given direction
+        (one bit), like mazelib.open_wall.
+
+        Parameters:
+        x (int): x-coordinate of the cell.
+        y (int): y-coordinate of the cell.
+        iDIR (int): The direction of the wall.
+
+        Returns:
+        bool: True if the wall was removed, False if already open or on the border.
+        """
+        nx, ny = ml.move_from(x, y, iDIR, 1)
+        if not (0 <= nx < self.width and 0 <= ny < self.height):
+            return False
+        buf, i, bit = self._edge(x, y, iDIR)
+        if not buf[i] & bit:
+            return False
+        buf[i] ^= bit
+        return True
+
+    def close_wall(self, x, y, iDIR):
+        """
+        Sets the wall between a cell and its neighbor in the given direction
+        (one bit), like mazelib.close_wall.
+
+        Parameters:
+        x (int): x-coordinate of the cell.
+        y (int): y-coordinate of the cell.
+        iDIR (int): The direction of the wall.
+
+        Returns:
+        bool: True if the wall was set, False if already set or on the border.
+        """
+        nx, ny = ml.move_from(x, y, iDIR, 1)
+        if not (0 <= nx < self.width and 0 <= ny < self.height):
+            return False
+        buf, i, bit = self._edge(x, y, iDIR)
+        if buf[i] & bit:
+            return False
+        buf[i] |= bit
+        return True
+
+    # Cell layout access: maze[y][x]
+    # ----------------
+
+    def cell(self, x, y):
+        """
+        Returns the wall bits of the cell (x, y), as in the cell layout.
+        """
+        cell = 0
+        for iDIR in range(len(ml.directions)):
+            buf, i, bit = self._edge(x, y, iDIR)
+            if buf[i] & bit:
+                cell |= 1 << iDIR
+        return cell
+
+    def set_cell(self, x, y, cell):
+        """
+        Sets the walls of the cell (x, y) from its wall bits.
+        Only the edges that change are written: the second write
+        of a carve (the neighbor side) finds its edge already done.
+        """
+        if cell >> len(ml.directions):
+            raise ValueError("WallPlanes stores only the wall bits of the cells")
+        for iDIR in range(len(ml.directions)):
+            buf, i, bit = self._edge(x, y, iDIR)
+            if (buf[i] & bit != 0) != (cell >> iDIR & 1):
+                buf[i] ^= bit
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if not -self.height <= y < self.height:
+            raise IndexError(y)
+        return _PlanesRow(self, y % self.height)
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield _PlanesRow(self, y)
+
+    def __array__(self, dtype=None, copy=None):
+        cells = self.to_cells()
+        return cells if dtype is None else cells.astype(dtype)
+
+
+
+
+class _PlanesRow:
+    # A row of WallPlanes, indexed as row[x]
+
+    __slots__ = ('planes', 'y')
+
+    def __init__(self, planes, y):
+        self.planes = planes
+        self.y      = y
+
+    def __len__(self):
+        return self.planes.width
+
+    def __getitem__(self, x):
+        if not -self.planes.width <= x < self.planes.width:
+            raise IndexError(x)
+        return self.planes.cell(x % self.planes.width, self.y)
+
+    def __setitem__(self, x, cell):
+        self.planes.set_cell(x % self.planes.width, self.y, int(cell))
+
+    def __iter__(self):
+        for x in range(self.planes.width):
+            yield self.planes.cell(x, self.y)
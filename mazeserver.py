@@ -0,0 +1,353 @@
+#!/usr/bin/python3
+
+# Maze Server
+# ----------------------------------------------------------------
+#   Local HTTP service generating mazes on demand.
+#   The worker processes are forked once at start-up and keep
+#   mazelib loaded (and warmed up), so a request costs only its generation.
+#   Concurrent requests of the same (algorithm, height, width) are
+#   batched: they are collected for a short window (or until the
+#   batch is full), then split in one task per worker, so a request
+#   waits for about one generation, not for the whole batch.
+#
+# Request
+#   GET /maze?algorithm=random_dfs&height=64&width=64[&seed=42]
+#   GET /algorithms           (one name per line)
+#
+# Response: the maze as wall planes (see mazeplanes), about 2 bits per cell
+#   header  : MAZE_MAGIC, height (u32), width (u32)
+#   data    : horizontal plane, then vertical plane (packed rows)
+
+import random
+import struct
+import argparse
+import threading
+import multiprocessing
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import mazelib as ml
+import mazeplanes as mp
+
+MAZE_MAGIC  = b'MZWP'
+MAZE_TYPE   = 'application/x-maze-planes'
+
+_HEADER = struct.Struct('<4sII')
+
+
+
+
+
+def encode_maze(maze):
+    """
+    Encodes a maze as its wall planes.
+
+    Parameters:
+    maze (list of list or ndarray or WallPlanes): The maze.
+
+    Returns:
+    bytes: The encoded maze.
+    """
+    if not isinstance(maze, mp.WallPlanes):
+        maze = mp.WallPlanes.from_maze(maze)
+    return _HEADER.pack(MAZE_MAGIC, maze.height, maze.width) + maze.h_bytes + maze.v_bytes
+
+
+
+def decode_maze(data):
+    """
+    Decodes a maze encoded by encode_maze.
+
+    Parameters:
+    data (bytes): The encoded maze.
+
+    Returns:
+    WallPlanes: The maze (see WallPlanes.to_cells for the cell layout).
+    """
+    magic, height, width = _HEADER.unpack_from(data, 0)
+    if magic != MAZE_MAGIC:
+        raise ValueError("not an encoded maze")
+    maze  = mp.WallPlanes(height, width)
+    start = _HEADER.size
+    end   = start + len(maze.h_bytes)
+    if len(data) != end + len(maze.v_bytes):
+        raise ValueError("truncated maze")
+    maze.h_bytes[:] = data[start:end]
+    maze.v_bytes[:] = data[end:]
+    return maze
+
+
+
+
+
+# Worker Processes
+# ----------------------------------------------------------------
+
+def _init_worker():
+    # Forked workers share the random state of the server
+    random.seed()
+    # Run every generator once, so the first request is not slower
+    state = random.getstate()
+    for generator in ml.generators.values():
+        generator(4, 4)
+    random.setstate(state)
+
+
+
+def generate_batch(algorithm, height, width, seeds):
+    """
+    Generates a batch of mazes of the same algorithm and size.
+    Runs in a worker process.
+
+    Parameters:
+    algorithm (str): The name of the algorithm (see mazelib.generators).
+    height (int): Height of the mazes.
+    width (int): Width of the mazes.
+    seeds (list): The random seed of each maze (None: not seeded).
+
+    Returns:
+    list: The encoded mazes (see encode_maze), in the order of seeds.
+    """
+    generator = ml.generators[algorithm]
+    mazes = []
+    for seed in seeds:
+        if seed is None:
+            maze = generator(height, width)
+        else:
+            # Same maze of a seeded run, the random sequence of the worker goes on
+            state = random.getstate()
+            try:
+                random.seed(seed)
+                maze = generator(height, width)
+            finally:
+                random.setstate(state)
+        mazes.append(encode_maze(maze))
+    return mazes
+
+
+
+
+
+class MazeBatcher:
+    """
+    Groups the requests of the same algorithm and size into batches
+    and runs them on a pool of warm worker processes.
+    """
+
+    def __init__(self, workers=None, max_batch=16, max_wait=0.002):
+        """
+        Starts the worker processes.
+
+        Parameters:
+        workers (int): Number of worker processes. Default is the number of CPUs.
+        max_batch (int): Largest batch of requests (split over the workers). Default is 16.
+        max_wait (float): Seconds a request waits for others to join its batch.
+                          Default is 2 ms.
+        """
+        self.max_batch = max_batch
+        self.max_wait  = max_wait
+        self.workers   = workers or multiprocessing.cpu_count()
+        self.pool      = multiprocessing.Pool(self.workers, initializer=_init_worker)
+        self.lock      = threading.Lock()
+        self.pending   = {}     # (algorithm, height, width) -> [(seed, future)]
+
+    def submit(self, algorithm, height, width, seed=None):
+        """
+        Requests a maze.
+
+        Parameters:
+        algorithm (str): The name of the algorithm (see mazelib.generators).
+        height (int): Height of the maze.
+        width (int): Width of the maze.
+        seed (int, optional): The random seed.
+
+        Returns:
+        Future: Resolved with the encoded maze (see encode_maze).
+        """
+        key    = (algorithm, height, width)
+        future = Future()
+        with self.lock:
+            batch = self.pending.setdefault(key, [])
+            batch.append((seed, future))
+            if len(batch) == 1:
+                # First of the batch: flush it when the window closes
+                timer = threading.Timer(self.max_wait, self.flush, (key, batch))
+                timer.daemon = True
+                timer.start()
+            if len(batch) < self.max_batch:
+                return future
+            del self.pending[key]
+        self._run(key, batch)
+        return future
+
+    def flush(self, key, batch):
+        """
+        Sends the batch to the workers, unless it was already sent (full).
+        """
+        with self.lock:
+            if self.pending.get(key) is not batch:
+                return
+            del self.pending[key]
+        self._run(key, batch)
+
+    def _run(self, key, batch):
+        # Spread the batch over the workers: one task per chunk,
+        # each chunk resolved as soon as it is generated
+        size = -(-len(batch) // self.workers)
+        for start in range(0, len(batch), size):
+            chunk   = batch[start:start + size]
+            seeds   = [seed for seed, _ in chunk]
+            futures = [future for _, future in chunk]
+            self.pool.apply_async(generate_batch, (*key, seeds),
+                                  callback=self._resolver(futures),
+                                  error_callback=self._failer(futures))
+
+    @staticmethod
+    def _resolver(futures):
+        def done(mazes):
+            for future, maze in zip(futures, mazes):
+                future.set_result(maze)
+        return done
+
+    @staticmethod
+    def _failer(futures):
+        def failed(exc):
+            for future in futures:
+                future.set_exception(exc)
+        return failed
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+
+
+
+
+# HTTP Server
+# ----------------------------------------------------------------
+
+class MazeRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # Largest maze served (cells)
+    max_cells = 1 << 24
+
+    def do_GET(self):
+        url   = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+
+        if url.path == '/algorithms':
+            self.reply(200, "\n".join(sorted(ml.generators)).encode(), 'text/plain')
+            return
+        if url.path != '/maze':
+            self.reply(404, b"not found\n", 'text/plain')
+            return
+
+        # Parse and check the parameters
+        try:
+            algorithm = query['algorithm'][0]
+            height    = int(query['height'][0])
+            width     = int(query['width'][0])
+            seed      = int(query['seed'][0]) if 'seed' in query else None
+        except (KeyError, ValueError):
+            self.reply(400, b"expected algorithm, height, width and optional seed\n", 'text/plain')
+            return
+        if algorithm not in ml.generators:
+            self.reply(400, b"unknown algorithm\n", 'text/plain')
+            return
+        if height < 1 or width < 1 or height * width > self.max_cells:
+            self.reply(400, b"invalid size\n", 'text/plain')
+            return
+
+        # Wait for the batch
+        try:
+            data = self.server.batcher.submit(algorithm, height, width, seed).result()
+        except Exception as exc:
+            self.reply(500, f"{exc}\n".encode(), 'text/plain')
+            return
+        self.reply(200, data, MAZE_TYPE)
+
+    def reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per request would cost more than a small maze
+        pass
+
+
+
+def serve(host='127.0.0.1', port=8765, workers=None, max_batch=16, max_wait=0.002):
+    """
+    Runs the maze server until interrupted.
+
+    Parameters:
+    host (str): The address to listen on. Default is localhost only.
+    port (int): The TCP port. Default is 8765.
+    workers (int): Number of worker processes. Default is the number of CPUs.
+    max_batch (int): Largest batch of requests (split over the workers).
+    max_wait (float): Seconds a request waits for others to join its batch.
+    """
+    # Fork the workers before the server threads exist
+    batcher = MazeBatcher(workers, max_batch, max_wait)
+    server  = ThreadingHTTPServer((host, port), MazeRequestHandler)
+    server.daemon_threads = True
+    server.batcher = batcher
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+
+def fetch_maze(algorithm, height, width, seed=None, host='127.0.0.1', port=8765):
+    """
+    Requests a maze from a running server.
+
+    Parameters:
+    algorithm (str): The name of the algorithm (see mazelib.generators).
+    height (int): Height of the maze.
+    width (int): Width of the maze.
+    seed (int, optional): The random seed.
+    host (str): The address of the server.
+    port (int): The TCP port of the server.
+
+    Returns:
+    WallPlanes: The maze.
+    """
+    query = {'algorithm': algorithm, 'height': height, 'width': width}
+    if seed is not None:
+        query['seed'] = seed
+    url = f"http://{host}:{port}/maze?{urllib.parse.urlencode(query)}"
+    with urllib.request.urlopen(url) as response:
+        return decode_maze(response.read())
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mazes on demand over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--max-batch", type=int, default=16, help="largest batch of requests (default: 16)")
+    parser.add_argument("--max-wait", type=float, default=2, help="batching window in ms (default: 2)")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, args.max_batch, args.max_wait / 1000)
+
+
+
+if __name__ == "__main__":
+    main()
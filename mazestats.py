@@ -0,0 +1,201 @@
+#!/usr/bin/python3
+
+# Maze Statistics
+# ----------------------------------------------------------------
+#   Texture measures of mazes, computed with whole-array operations
+#   on one maze (height, width) or on a stacked batch (n, height, width).
+#   Every result is an array with the leading (batch) shape of the input.
+#
+#   dead_ends       : number of cells with one passage
+#   junctions       : number of cells with three or more passages
+#   degree_hist     : number of cells with 0, 1, 2, 3, 4 passages
+#   straightness    : fraction of corridor cells (two passages) going straight
+#   corridor_hist   : number of straight runs of k cells, k = 0 .. max(height, width)
+#   solution_length : moves from the top-left to the bottom-right cell (-1 if unreachable)
+
+import random
+import numpy as np
+import mazelib as ml
+
+
+
+
+def stack_mazes(mazes):
+    """
+    Stacks mazes of the same size into one array.
+
+    Parameters:
+    mazes (list): The mazes (lists of lists or arrays).
+
+    Returns:
+    ndarray: A (n, height, width) uint8 array.
+    """
+    return np.stack([ml.maze_to_array(maze) for maze in mazes])
+
+
+
+def run_length_hist(passages, max_len):
+    """
+    Histogram of the lengths of the runs of consecutive passages along the last axis.
+    A run of k passages is a straight corridor of k+1 cells.
+
+    Parameters:
+    passages (ndarray): A (..., rows, length) bool array.
+    max_len (int): The largest corridor length (in cells) of the histogram.
+
+    Returns:
+    ndarray: A (..., max_len+1) int array, counts indexed by corridor length in cells.
+    """
+    lead = passages.shape[:-2]
+    rows, length = passages.shape[-2:]
+    n = int(np.prod(lead, dtype=np.int64))
+
+    # Pad each row with closed passages, runs start at +1 and end at -1
+    padded = np.zeros((n, rows, length+2), dtype=np.int8)
+    padded[..., 1:-1] = passages.reshape(n, rows, length)
+    steps  = np.diff(padded, axis=-1)
+    starts = np.argwhere(steps == 1)
+    ends   = np.argwhere(steps == -1)
+
+    # Corridor length in cells, counted per maze
+    cells = ends[:, 2] - starts[:, 2] + 1
+    hist  = np.bincount(starts[:, 0] * (max_len+1) + cells, minlength=n * (max_len+1))
+    return hist.reshape(lead + (max_len+1,))
+
+
+
+def solution_length(mask):
+    """
+    Length of the path from the top-left to the bottom-right cell.
+    Breadth-first search run on all the mazes at once, one frontier step per iteration.
+    The frontier is the array of the flat ids of its cells (batch included),
+    so a step costs the size of the frontier, not of the batch,
+    and the cells of the mazes that reached their goal are dropped.
+
+    Parameters:
+    mask (ndarray): The (..., height, width, 4) open passages (see mazelib.open_mask).
+
+    Returns:
+    ndarray: The number of moves of each maze, -1 if the goal is unreachable.
+    """
+    lead    = mask.shape[:-3]
+    height, width = mask.shape[-3:-1]
+    n_cells = height * width
+    n_mazes = int(np.prod(lead, dtype=np.int64))
+    n_dirs  = len(ml.directions)
+
+    # Flat ids: maze * n_cells + y * width + x
+    flat    = mask.reshape(n_mazes * n_cells, n_dirs)
+    offsets = [dy*width + dx for dx, dy in ml.directions]
+
+    # Start from the top-left cell of each maze
+    frontier = np.arange(n_mazes, dtype=np.int64) * n_cells
+    reached  = np.zeros(n_mazes * n_cells, dtype=bool)
+    reached[frontier] = True
+    goals    = frontier + n_cells - 1
+    length   = np.full(n_mazes, -1, dtype=np.int64)
+
+    step = 0
+    while frontier.size:
+        # Record the mazes reaching the goal at this step, drop their cells
+        done = reached[goals] & (length < 0)
+        if done.any():
+            length[done] = step
+            frontier = frontier[length[frontier // n_cells] < 0]
+
+        # Expand the frontier through the open passages
+        if frontier.size == 0:
+            break
+        nxt = np.concatenate([frontier[flat[frontier, iDIR]] + offsets[iDIR]
+                              for iDIR in range(n_dirs)])
+        nxt = np.unique(nxt[~reached[nxt]])
+        reached[nxt] = True
+        frontier = nxt
+        step += 1
+
+    return length.reshape(lead)
+
+
+
+def maze_stats(mazes):
+    """
+    Computes the texture statistics of one maze or of a batch of mazes.
+
+    Parameters:
+    mazes (list of list, ndarray or list of mazes): One maze, a stacked
+        (n, height, width) array, or a list of mazes of the same size.
+
+    Returns:
+    dict: The statistics (see the module header), as numpy arrays.
+    """
+    # One maze or a batch
+    if isinstance(mazes, np.ndarray):
+        cells = mazes
+    elif isinstance(mazes[0][0], (int, np.integer)):
+        cells = ml.maze_to_array(mazes)
+    else:
+        cells = stack_mazes(mazes)
+    height, width = cells.shape[-2:]
+
+    mask   = ml.open_mask(cells)
+    degree = mask.sum(axis=-1)
+
+    # Degree distribution
+    degree_hist = np.stack([(degree == d).sum(axis=(-2, -1)) for d in range(5)], axis=-1)
+
+    # Straight corridor cells over all corridor cells
+    corridor = degree == 2
+    straight = corridor & ((mask[..., ml.iN] & mask[..., ml.iS]) | (mask[..., ml.iW] & mask[..., ml.iE]))
+    n_corridor   = corridor.sum(axis=(-2, -1))
+    straightness = straight.sum(axis=(-2, -1)) / np.maximum(n_corridor, 1)
+
+    # Straight runs: rows of E passages, columns of S passages
+    max_len = max(height, width)
+    corridor_hist  = run_length_hist(mask[..., :, :-1, ml.iE], max_len)
+    corridor_hist += run_length_hist(np.swapaxes(mask[..., :-1, :, ml.iS], -2, -1), max_len)
+
+    return {
+        'dead_ends'       : degree_hist[..., 1],
+        'junctions'       : degree_hist[..., 3] + degree_hist[..., 4],
+        'degree_hist'     : degree_hist,
+        'straightness'    : straightness,
+        'corridor_hist'   : corridor_hist,
+        'solution_length' : solution_length(mask),
+    }
+
+
+
+def compare_algorithms(generators, height, width, samples=100, seed=None):
+    """
+    Generates samples of mazes with each algorithm and computes their statistics.
+
+    Parameters:
+    generators (list): The generation functions (e.g. mazelib.gen_random_dfs).
+    height (int): Height of the mazes.
+    width (int): Width of the mazes.
+    samples (int): Number of mazes per algorithm.
+    seed (int, optional): Seed of the random generator.
+
+    Returns:
+    dict: For each generator name, the statistics of its batch (see maze_stats).
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    results = {}
+    for gen in generators:
+        batch = stack_mazes([gen(height, width) for _ in range(samples)])
+        results[gen.__name__] = maze_stats(batch)
+    return results
+
+
+
+if __name__ == "__main__":
+
+    # Compare the algorithms on a sample of small mazes
+    gens = [ml.gen_binary_tree_se, ml.gen_aldous_broder, ml.gen_hunt_and_kill, ml.gen_random_dfs]
+    for name, stats in compare_algorithms(gens, 20, 20, samples=50, seed=0).items():
+        print(f"{name:20} dead-ends {stats['dead_ends'].mean():7.1f}"
+              f"   junctions {stats['junctions'].mean():7.1f}"
+              f"   straightness {stats['straightness'].mean():5.2f}"
+              f"   solution {stats['solution_length'].mean():7.1f}")
@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+
+# Maze Tiles
+# ----------------------------------------------------------------
+#   Exports a maze as a Deep Zoom image (.dzi), the tile pyramid
+#   read by deep-zoom viewers (e.g. OpenSeadragon):
+#
+#   <name>.dzi                      size and tile size (XML)
+#   <name>_files/<level>/<col>_<row>.png
+#
+#   The deepest level is the wall raster of the maze (see mazelib.maze_raster),
+#   each raster pixel scaled to scale x scale pixels.
+#   Each tile renders only the cells below it, so the maze can be
+#   a memory-mapped grid far larger than the RAM.
+#   Each upper level halves the one below: a tile is the average of
+#   its (up to) four child tiles, read back from disk.
+#   The tiles of a level are rendered by a thread pool.
+#
+#   Incremental export: the hash of the content of each tile
+#   (its cells, or the hashes of its children) is kept in
+#   <name>_files/tiles.json; a tile whose hash did not change is not
+#   rendered again, so re-exporting an edited maze only redraws
+#   the tiles around the edits.
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import mazelib as ml
+
+HASHES_FILE = 'tiles.json'
+
+
+
+
+
+def level_sizes(width, height):
+    """
+    Computes the image size of each level of the pyramid.
+    Level 0 is one pixel, each level doubles the previous one.
+
+    Parameters:
+    width (int): Width of the full image, in pixels.
+    height (int): Height of the full image, in pixels.
+
+    Returns:
+    list: (width, height) of each level, from level 0 to the full image.
+    """
+    max_level = max(int(np.ceil(np.log2(max(width, height)))), 0)
+    return [(-(-width >> (max_level - level)), -(-height >> (max_level - level)))
+            for level in range(max_level + 1)]
+
+
+
+def _save_tile(path, tile):
+    from PIL import Image
+    Image.fromarray(tile).save(path, compress_level=1)
+
+
+
+def _load_tile(path):
+    from PIL import Image
+    with Image.open(path) as im:
+        return np.asarray(im.convert('RGB'))
+
+
+
+
+def save_tiles(maze, path, tile_size=256, scale=4, workers=None):
+    """
+    Exports the maze as a Deep Zoom image (tile pyramid).
+
+    Parameters:
+    maze (list of list or ndarray): The maze, e.g. memory-mapped from load_maze_file.
+    path (str): The output .dzi file; the tiles go in <name>_files.
+    tile_size (int): The size of the tiles, in pixels. Default is 256.
+    scale (int): Pixels per raster pixel at the deepest level
+                 (a cell and a wall are scale pixels wide). Default is 4.
+    workers (int): Number of rendering threads. Default is the number of CPUs.
+
+    Returns:
+    int: The number of tiles rendered (the others did not change).
+    """
+    cells  = maze if isinstance(maze, np.ndarray) else ml.maze_to_array(maze)
+    height, width = cells.shape
+    sizes  = level_sizes((2*width + 1) * scale, (2*height + 1) * scale)
+    root   = os.path.splitext(path)[0] + '_files'
+    os.makedirs(root, exist_ok=True)
+
+    # Hashes of the previous export (only if made with the same parameters)
+    params      = [height, width, tile_size, scale]
+    hashes_path = os.path.join(root, HASHES_FILE)
+    old_hashes  = {}
+    if os.path.exists(hashes_path):
+        with open(hashes_path) as fp:
+            saved = json.load(fp)
+        if saved.get('params') == params:
+            old_hashes = saved['tiles']
+    hashes   = {}
+    rendered = 0
+
+    def tile_path(level, col, row):
+        return os.path.join(root, str(level), f"{col}_{row}.png")
+
+    def tile_key(level, col, row):
+        return f"{level}/{col}_{row}"
+
+    def grid(level):
+        level_w, level_h = sizes[level]
+        return -(-level_w // tile_size), -(-level_h // tile_size)
+
+    def deepest(col, row):
+        # Pixels of the tile, then raster pixels below them
+        level_w, level_h = sizes[-1]
+        x0, x1 = col*tile_size, min((col+1)*tile_size, level_w)
+        y0, y1 = row*tile_size, min((row+1)*tile_size, level_h)
+        r0, r1 = y0 // scale, -(-y1 // scale)
+        c0, c1 = x0 // scale, -(-x1 // scale)
+
+        # Content: the cells of the window
+        ya, yb = max(0, (r0 - 1) // 2), min(height, (r1 - 1) // 2 + 1)
+        xa, xb = max(0, (c0 - 1) // 2), min(width, (c1 - 1) // 2 + 1)
+        block  = np.ascontiguousarray(cells[ya:yb, xa:xb]) & 0x0F
+        digest = hashlib.blake2b(block.tobytes(), digest_size=16)
+        digest.update(np.array([r0, r1, c0, c1, yb - ya, xb - xa]).tobytes())
+        digest = digest.hexdigest()
+
+        key   = tile_key(len(sizes) - 1, col, row)
+        tpath = tile_path(len(sizes) - 1, col, row)
+        if old_hashes.get(key) == digest and os.path.exists(tpath):
+            return key, digest, False
+
+        raster = ml.maze_raster_window(block, r0 - 2*ya, r1 - 2*ya, c0 - 2*xa, c1 - 2*xa)
+        raster = raster.repeat(scale, axis=0).repeat(scale, axis=1)
+        raster = raster[y0 - r0*scale:y1 - r0*scale, x0 - c0*scale:x1 - c0*scale]
+        _save_tile(tpath, np.round(raster * 255).astype(np.uint8))
+        return key, digest, True
+
+    def upper(level, col, row):
+        # Children in the level below
+        cols, rows = grid(level + 1)
+        children   = [(c, r) for r in (2*row, 2*row + 1) for c in (2*col, 2*col + 1)
+                      if c < cols and r < rows]
+
+        # Content: the hashes of the children
+        digest = hashlib.blake2b(digest_size=16)
+        for c, r in children:
+            digest.update(hashes[tile_key(level + 1, c, r)].encode())
+        digest = digest.hexdigest()
+
+        key   = tile_key(level, col, row)
+        tpath = tile_path(level, col, row)
+        if old_hashes.get(key) == digest and os.path.exists(tpath):
+            return key, digest, False
+
+        # Paste the children, then halve
+        level_w, level_h = sizes[level + 1]
+        x0, y0 = 2*col*tile_size, 2*row*tile_size
+        canvas = np.zeros((min(2*tile_size, level_h - y0), min(2*tile_size, level_w - x0), 3))
+        for c, r in children:
+            child = _load_tile(tile_path(level + 1, c, r))
+            dx, dy = (c - 2*col)*tile_size, (r - 2*row)*tile_size
+            canvas[dy:dy + child.shape[0], dx:dx + child.shape[1]] = child
+        tile = ml.downsample(canvas, 2)
+        _save_tile(tpath, np.round(tile).astype(np.uint8))
+        return key, digest, True
+
+    # From the deepest level up, the tiles of a level in parallel
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for level in reversed(range(len(sizes))):
+            os.makedirs(os.path.join(root, str(level)), exist_ok=True)
+            cols, rows = grid(level)
+            tiles = [(col, row) for row in range(rows) for col in range(cols)]
+            if level == len(sizes) - 1:
+                results = pool.map(lambda t: deepest(*t), tiles)
+            else:
+                results = pool.map(lambda t: upper(level, *t), tiles)
+            for key, digest, done in results:
+                hashes[key] = digest
+                rendered += done
+
+    # Descriptor and hashes
+    full_w, full_h = sizes[-1]
+    with open(path, 'w') as fp:
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+                 f'TileSize="{tile_size}" Overlap="0" Format="png">\n'
+                 f'  <Size Width="{full_w}" Height="{full_h}"/>\n'
+                 '</Image>\n')
+    with open(hashes_path, 'w') as fp:
+        json.dump({'params': params, 'tiles': hashes}, fp)
+
+    return rendered
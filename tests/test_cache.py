@@ -0,0 +1,22 @@
+import os
+import sys
+import stat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mazecache as mc
+
+
+
+
+def test_cached_maze_mode_follows_umask(tmp_path):
+    cache = mc.MazeCache(str(tmp_path))
+    old   = os.umask(0o027)
+    try:
+        maze = cache.generate('binary_tree_se', 6, 7, 3)
+    finally:
+        os.umask(old)
+
+    path = cache.path('binary_tree_se', 6, 7, 3)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+    assert (cache.generate('binary_tree_se', 6, 7, 3) == maze).all()
@@ -0,0 +1,18 @@
+import os
+import sys
+import random
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mazelib as ml
+
+
+
+
+def test_recursive_division_perfect():
+    # Thin, square and oblong grids: every round splits chambers of mixed shapes
+    random.seed(7)
+    for height, width in [(1, 1), (1, 9), (2, 2), (17, 5), (64, 100)]:
+        maze = ml.gen_recursive_division(height, width)
+        assert maze.shape == (height, width)
+        assert ml.verify_maze(maze) == []
@@ -0,0 +1,42 @@
+import os
+import sys
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import make_gif as mg
+
+
+
+
+def _save_frames(directory, frames):
+    os.makedirs(directory)
+    for i, frame in enumerate(frames):
+        Image.fromarray(frame).save(os.path.join(directory, f'img_{i:04d}.png'))
+
+
+
+def _read_gif(path):
+    frames = []
+    with Image.open(path) as im:
+        for i in range(im.n_frames):
+            im.seek(i)
+            frames.append(np.asarray(im.convert('RGB')))
+    return frames
+
+
+
+def test_gif_palette_grows_then_overflows(tmp_path):
+    # New colors in most frames, past the size of the global palette midway
+    rng    = np.random.default_rng(0)
+    frame  = np.zeros((40, 50, 3), dtype=np.uint8)
+    frames = []
+    for i in range(12):
+        frame = frame.copy()
+        frame[3*i:3*i + 3, :4*i + 2] = rng.integers(0, 256, (3, 4*i + 2, 3))
+        frames.append(frame)
+    _save_frames(tmp_path / 'frames', frames)
+
+    mg.create_gif_from_images(str(tmp_path / 'frames'), str(tmp_path / 'out.gif'))
+    for expected, frame in zip(frames, _read_gif(tmp_path / 'out.gif'), strict=True):
+        assert (frame == expected).all()
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import random
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mazelib as ml
+import mazeplanes as mp
+
+
+
+
+class _Axes:
+    # Stands in for a matplotlib axis, keeps the drawn image
+    def imshow(self, image, **kwargs):
+        self.image = image
+
+
+
+def test_draw_large_wall_planes_maze():
+    # Large enough for the raster path of draw_maze
+    random.seed(1)
+    cells  = ml.maze_to_array(ml.gen_binary_tree_se(300, 300))
+    planes = mp.WallPlanes.from_maze(cells)
+    assert 512 / 300 < ml.min_cell_pixels
+
+    ml.draw_maze(planes, pixels=512)
+    ml.load_pyplot().close('all')
+
+    # Same image of the cell layout
+    ax_planes, ax_cells = _Axes(), _Axes()
+    ml.draw_maze_raster(ax_planes, planes, 512)
+    ml.draw_maze_raster(ax_cells, cells, 512)
+    np.testing.assert_array_equal(ax_planes.image, ax_cells.image)
+
+
+
+def test_draw_walls_one_collection():
+    # Cells of 10 pixels: the walls path of draw_maze, in a few artists
+    random.seed(2)
+    cells = ml.maze_to_array(ml.gen_random_dfs(200, 200))
+    assert 2048 / 200 >= ml.min_cell_pixels
+
+    plt   = ml.load_pyplot()
+    start = time.perf_counter()
+    ml.draw_maze(cells, pixels=2048)
+    fig   = plt.gcf()
+    fig.canvas.draw()
+    assert time.perf_counter() - start < 10
+
+    ax = fig.axes[0]
+    horizontal, vertical = ml.wall_segments(cells)
+    assert len(ax.lines) == 0 and len(ax.patches) == 0
+    assert len(ax.collections) == 2
+    assert len(ax.collections[1].get_segments()) == len(horizontal) + len(vertical)
+    plt.close('all')
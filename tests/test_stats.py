@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import random
+from collections import deque
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mazelib as ml
+import mazestats as ms
+
+
+
+
+def _bfs_length(mask):
+    # Reference: breadth-first search of one maze, cell by cell
+    height, width = mask.shape[:2]
+    dist  = {(0, 0): 0}
+    queue = deque([(0, 0)])
+    while queue:
+        x, y = queue.popleft()
+        for iDIR, (dx, dy) in enumerate(ml.directions):
+            if mask[y, x, iDIR] and (x + dx, y + dy) not in dist:
+                dist[x + dx, y + dy] = dist[x, y] + 1
+                queue.append((x + dx, y + dy))
+    return dist.get((width - 1, height - 1), -1)
+
+
+
+def test_solution_length_matches_bfs():
+    random.seed(3)
+    mazes = [ml.gen_random_dfs(20, 25) for _ in range(6)]
+    mazes = [ml.braid(ml.maze_to_array(maze), 0.5, rng=i) for i, maze in enumerate(mazes)]
+    cells = ms.stack_mazes(mazes)
+    # Cut one maze in two: its goal is unreachable
+    cells[2, :, 10] |= (1 << ml.iE) | (1 << ml.iW)
+
+    mask   = ml.open_mask(cells)
+    length = ms.solution_length(mask)
+    assert list(length) == [_bfs_length(m) for m in mask]
+    assert length[2] == -1
+    assert ms.solution_length(mask[0]) == length[0]
+
+
+
+def test_solution_length_large_batch():
+    # 100 DFS mazes of 100x100 (long paths): seconds, not minutes
+    random.seed(1)
+    cells = np.repeat(ml.maze_to_array(ml.gen_random_dfs(100, 100))[None], 100, axis=0)
+    mask  = ml.open_mask(cells)
+
+    start  = time.perf_counter()
+    length = ms.solution_length(mask)
+    assert time.perf_counter() - start < 3
+    assert (length == _bfs_length(mask[0])).all()